@@ -71,6 +71,27 @@ def LxF(Ul, Ur):
    res = as_vector([f1, f2]) - 0.5*lam*(Ur - Ul)
    return res
 #------------------------------------------------------------------------------
+# Control operator: columns dF/dc_j, j=1..n, for a list of scalar Constants c_j
+# appearing in form F. The controls are replaced by components of a function c
+# in a real vector space, so all columns come from one assembly of the
+# bilinear form dF/dc. Derivative is evaluated at current values of controls.
+#------------------------------------------------------------------------------
+class ControlOperator():
+   def __init__(self, F, controls, mesh):
+      self.controls = controls
+      n = len(controls)
+      R = VectorFunctionSpace(mesh, "R", 0, dim=n)
+      self.c = Function(R)
+      Fc = replace(F, dict((ci, self.c[j]) for j, ci in enumerate(controls)))
+      self.dF = derivative(Fc, self.c, TrialFunction(R))
+
+   def assemble(self):
+      """Returns N x n array"""
+      vals = tuple(float(ci) for ci in self.controls)
+      self.c.assign(interpolate(Constant(vals), self.c.function_space()))
+      return assemble(self.dF).array()
+
+#------------------------------------------------------------------------------
 mesh = IntervalMesh(nc, xmin, xmax)
 h = (xmax-xmin)/nc
 
@@ -1,8 +1,17 @@
 from dolfin import *
 from param  import *
 from common import *
+from newton import *
 import scipy.io as sio
 import numpy as np
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-implicit_feedback', action='store_true',
+                    help='Feedback at new time level (Woodbury-Newton)')
+parser.add_argument('-reuse_jacobian', action='store_true',
+                    help='Modified Newton: reuse Jacobian and its LU')
+args = parser.parse_args()
 
 Uf_stat = Function(Qh)
 Uf_stat = project(StationarySolution(), Qh)
@@ -47,10 +56,17 @@ energy -= (Uf_stat[0]**gamma/(gamma-1.0) + 0.5*Uf_stat[1]**2/Uf_stat[0])*dx
 # Load gain matrix
 G = sio.loadmat('gain.mat')
 
+if args.implicit_feedback:
+   solver = NewtonSolver(B_BDF2, U, [ul, ur], G['G'], Uf_stat.vector().array(),
+                         reuse_jacobian=args.reuse_jacobian)
+elif args.reuse_jacobian:
+   solver = NewtonSolver(B_BDF2, U, reuse_jacobian=True)
+
 while t < Tf:
-   a = -np.dot(G['G'],Uo.vector().array()-Uf_stat.vector().array())
-   ul.assign(a[0])
-   ur.assign(a[1])
+   if not args.implicit_feedback:
+      a = -np.dot(G['G'],Uo.vector().array()-Uf_stat.vector().array())
+      ul.assign(a[0])
+      ur.assign(a[1])
    solver.solve()
    Uoo.assign(Uo)
    Uo.assign(U)
@@ -61,3 +77,7 @@ while t < Tf:
    print("Step = %g  %g  %18.12e %10.4e %10.4e" % (i, t, e, ul, ur))
    if i%10 == 0:
       fo << U
+
+if args.reuse_jacobian:
+   print("Jacobian refreshes = %d, Newton iterations = %d, rejected = %d, time steps = %d" %
+         (solver.nrefresh, solver.niter, solver.nreject, i))
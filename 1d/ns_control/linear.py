@@ -1,6 +1,9 @@
 from dolfin import *
 from param import *
 from common import *
+import numpy as np
+from dolfin_scipy import as_scipy
+from eigensolver import eig
 
 Uo = project(StationarySolution(), Qh)
 U.assign(Uo)
@@ -11,18 +14,16 @@ dU = TrialFunction(Qh)
 dB = derivative(B, U, dU)
 
 # M du/dt = A u
-M = PETScMatrix()
-assemble( inner(dU, W)*dx, tensor=M )
-A = PETScMatrix()
-assemble(dB, tensor=A)
-print M
-print A
+M = as_scipy(assemble( inner(dU, W)*dx ))
+A = as_scipy(assemble(dB))
+print("Size of M = %d x %d" % M.shape)
+print("Size of A = %d x %d" % A.shape)
 
-eigensolver = SLEPcEigenSolver(A, M)
-eigensolver.solve()
+# All eigenvalues by dense QZ for small problems, else Krylov
+vals, vecs = eig(A, M)
 
-Ndof = Qh.dim()
+for v in vals:
+   print("%24.14e %24.14e" % (v.real, v.imag))
 
-for i in range(Ndof):
-   r, c = eigensolver.get_eigenvalue(i)
-   print r, c
+print("Saving eigenvalues into eig.dat")
+np.savetxt("eig.dat", np.column_stack((vals.real, vals.imag)))
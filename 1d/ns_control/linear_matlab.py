@@ -3,12 +3,19 @@ import numpy as np
 import scipy.sparse as sps
 import scipy.sparse.linalg as la
 import scipy.io as sio
+import argparse
+from dolfin_scipy import as_scipy
 
 parameters.linear_algebra_backend = "uBLAS"
 
 from param import *
 from common import *
 
+parser = argparse.ArgumentParser()
+parser.add_argument('-controls', nargs='+', default=['ul','ur'],
+                    help='Names of control parameters in param.py')
+args = parser.parse_args()
+
 Uo = project(StationarySolution(), Qh)
 U.assign(Uo)
 
@@ -18,31 +25,25 @@ dU = TrialFunction(Qh)
 dB = derivative(B, U, dU)
 
 M = assemble( inner(dU, W)*dx )
-rows, cols, values = M.data()
-M = sps.csc_matrix((values, cols, rows))
+M = as_scipy(M)
 N = M.shape[0]
 print "Size of M =",M.shape[0], M.shape[1]
 
 A = assemble(dB)
-rows, cols, values = A.data()
-A = sps.csc_matrix((values, cols, rows))
+A = as_scipy(A)
 N = A.shape[0]
 print "Size of A =",A.shape[0],A.shape[1]
 
-# Derivative wrt ul
-B_ul = diff(B, ul)
-B_ul = assemble(B_ul)
-print B_ul
-B_ul = B_ul.array()
-
-# Derivative wrt ur
-B_ur = diff(B, ur)
-B_ur = assemble(B_ur)
-print B_ur
-B_ur = B_ur.array()
+# Derivative wrt all controls in one assembly
+controls = [globals()[name] for name in args.controls]
+Bc = ControlOperator(B, controls, mesh).assemble()
+print "Size of B =",Bc.shape[0],Bc.shape[1]
 
-# Save matrices in matlab format
-sio.savemat('linear.mat', mdict={'M':M, 'A':A, 'B_ul': B_ul, 'B_ur':B_ur})
+# Save matrices in matlab format; B_<name> is column of control <name>
+mdict = {'M':M, 'A':A, 'B':Bc}
+for j, name in enumerate(args.controls):
+   mdict['B_'+name] = Bc[:,j]
+sio.savemat('linear.mat', mdict=mdict, oned_as='column')
 
 
 # Now read it back
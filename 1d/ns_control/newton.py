@@ -0,0 +1,129 @@
+from dolfin import *
+from common import ControlOperator
+import numpy as np
+from lagged_jacobian import LaggedJacobian
+
+#------------------------------------------------------------------------------
+# Newton method for F(U) = 0 inside a time stepping loop.
+#
+# reuse_jacobian=True gives a modified Newton method: the Jacobian and its LU
+# factors are kept across Newton iterations and time steps. They are refreshed
+# only when the residual contraction rate |F_{k+1}|/|F_k| exceeds max_rate, and
+# every refresh is logged. A step which increases the residual with a Jacobian
+# from an earlier iterate is undone and taken again with a fresh Jacobian (see
+# utils/lagged_jacobian.py). Since the state changes little between time steps,
+# most steps need no factorization at all.
+#
+# If controls and gain G are given, boundary controls c = -G*(U - Us) are
+# taken at the new time level. Jacobian of the closed-loop system is
+#
+#     J - Bc*G,   J = dF/dU,  Bc = dF/dc  (N x nc)
+#
+# which is dense because of G. It is never formed: each Newton step uses LU of
+# the sparse J and the Woodbury formula
+#
+#     (J - Bc*G)^{-1} r = y + W (I - G W)^{-1} G y,   y = J^{-1} r, W = J^{-1} Bc
+#
+# so the extra cost is nc solves with the same factorization.
+#------------------------------------------------------------------------------
+class NewtonSolver():
+   def __init__(self, F, U, controls=None, G=None, Us=None, reuse_jacobian=False,
+                max_rate=0.5, atol=1.0e-10, rtol=1.0e-9, maxiter=50):
+      self.F  = F
+      self.U  = U
+      self.controls = controls if G is not None else []
+      self.G  = G
+      self.Us = Us
+      self.reuse_jacobian = reuse_jacobian
+      self.policy = LaggedJacobian(reuse_jacobian, max_rate)
+      self.atol = atol
+      self.rtol = rtol
+      self.maxiter = maxiter
+
+      dU = TrialFunction(U.function_space())
+      self.J  = derivative(F, U, dU)
+      if G is not None:
+         self.Bc = ControlOperator(F, self.controls, U.function_space().mesh())
+
+      self.A = PETScMatrix()
+      self.b = PETScVector()
+      self.x = U.vector().copy()  # work vector
+      self.solver = None
+
+      # Counters
+      self.niter = 0
+
+   @property
+   def nrefresh(self):
+      return self.policy.nrefresh
+
+   @property
+   def nreject(self):
+      return self.policy.nreject
+
+   def set_controls(self):
+      if self.G is None:
+         return
+      c = -np.dot(self.G, self.U.vector().array() - self.Us)
+      for ci, ctrl in zip(c, self.controls):
+         ctrl.assign(ci)
+
+   def residual(self):
+      self.set_controls()
+      assemble(self.F, tensor=self.b)
+      return self.b.norm('l2')
+
+   def update_jacobian(self, reason):
+      assemble(self.J, tensor=self.A)
+      self.solver = LUSolver(self.A)
+      self.solver.parameters['reuse_factorization'] = True
+      if self.reuse_jacobian:
+         print("   Jacobian refresh %d: %s" % (self.nrefresh, reason))
+
+      # Control columns and W = J^{-1} Bc
+      if self.G is not None:
+         nc = len(self.controls)
+         Bc = self.Bc.assemble()
+         self.W = np.zeros((self.x.size(), nc))
+         bc = self.x.copy()
+         for j in range(nc):
+            bc[:] = Bc[:,j]
+            self.solver.solve(self.x, bc)
+            self.W[:,j] = self.x.array()
+         self.C = np.eye(nc) - np.dot(self.G, self.W)
+
+   def correction(self):
+      self.b *= -1.0
+      self.solver.solve(self.x, self.b)
+      du = self.x.array()
+      if self.G is not None:
+         Gy = np.dot(self.G, du)
+         du = du + np.dot(self.W, np.linalg.solve(self.C, Gy))
+      return du
+
+   def solve(self):
+      U = self.U
+      res = res0 = self.residual()
+      for it in range(self.maxiter):
+         print("   Newton %2d  %12.4e" % (it, res))
+         if res < self.atol or res < self.rtol*res0:
+            return it
+
+         reason = self.policy.refresh()
+         if reason is not None:
+            self.update_jacobian(reason)
+
+         U0 = U.vector().array()
+         U.vector()[:] = U0 + self.correction()
+         self.niter += 1
+
+         res_new = self.residual()
+         if not self.policy.accept(res_new / res):
+            print("   Newton step rejected, rate = %8.3e" % (res_new / res))
+            U.vector()[:] = U0
+            res = self.residual()
+            continue
+         res = res_new
+
+      print("Newton did not converge in %d iterations" % self.maxiter)
+      return self.maxiter
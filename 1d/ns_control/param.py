@@ -17,14 +17,9 @@ U_stat = as_vector([rho_stat, rho_stat*u_stat])
 # Shift to destabilize
 omega = Constant(0.0);
 
-# Boundary condition for velocity
+# Boundary condition for velocity; these are the control parameters
 ul     = Constant(0.0)
 ur     = Constant(0.0)
 
-# These two lines required for generating linear system.
-# Otherwise comment them.
-ul     = variable(ul)
-ur     = variable(ur)
-
 dt     = 1.0e-2   # time step
 Tf     = 50.0     # final time
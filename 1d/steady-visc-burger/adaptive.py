@@ -0,0 +1,115 @@
+"""
+Goal oriented adaptive solution of
+
+    (u^2/2)_x - u_xx = f(x),   u(0) = u(1) = 0
+
+with goal J(u) = int u^2/2 dx. Primal, adjoint and error indicators are
+computed in memory on every level:
+
+  * primal by Newton, starting from the solution on the previous mesh
+  * newton() returns its LU solver set to the Jacobian at the converged
+    solution, which is factorized once; its transpose solve gives the adjoint
+    J'(u)^T z = dJ/du
+  * dual weighted residual: eta_K = -F(u; (Ez - z) chi_K), where Ez is the
+    piecewise quadratic extrapolation of z, set to zero on the Dirichlet
+    boundary like z, and the estimate is sum eta_K
+  * cells with the largest |eta_K| are refined (bulk criterion)
+
+python adaptive.py -tol 1e-8
+"""
+from dolfin import *
+import numpy as np
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, help='Cells in initial mesh', default=10)
+parser.add_argument('-tol', type=float, help='Tolerance on error in J', default=1.0e-8)
+parser.add_argument('-theta', type=float, help='Bulk marking fraction', default=0.5)
+parser.add_argument('-maxlevel', type=int, help='Max refinement levels', default=20)
+args = parser.parse_args()
+
+# Sub domain for Dirichlet boundary condition
+def DirichletBoundary(x):
+     return x[0] < DOLFIN_EPS or x[0] > 1.0 - DOLFIN_EPS
+
+f = Expression("10.0*x[0]*(1.0-x[0])*sin(x[0])")
+
+def newton(F, dF, u, bc, atol=1.0e-12, maxiter=20):
+   """Returns LU solver for the Jacobian at converged u and no. of iterations.
+   The Jacobian at u is factorized at the first solve with the returned solver
+   and the factors are kept for further solves."""
+   solver = LUSolver()
+   du = u.vector().copy()
+   for it in range(maxiter+1):
+      A, b = assemble_system(dF, F, bc)
+      res = b.norm("l2")
+      if res < atol or it == maxiter:
+         break
+      solver.set_operator(A)
+      solver.solve(du, b)
+      u.vector().axpy(-1.0, du)
+   if res >= atol:
+      print("Newton did not converge, residual = %e" % res)
+   solver.set_operator(A)
+   solver.parameters["reuse_factorization"] = True
+   return solver, it
+
+mesh = UnitIntervalMesh(args.N)
+uold = None
+
+print("%5s %8s %6s %8s %16s %12s" % ("level", "cells", "dofs", "newton", "J(u)", "estimate"))
+for level in range(args.maxlevel):
+   V  = FunctionSpace(mesh, "CG", 1)
+   u  = Function(V)
+   v  = TestFunction(V)
+   du = TrialFunction(V)
+   bc = DirichletBC(V, Constant(0.0), DirichletBoundary)
+
+   if uold is not None:
+      uold.set_allow_extrapolation(True)
+      u.interpolate(uold)
+
+   F  = (-0.5*u**2*v.dx(0) + inner(grad(u), grad(v)))*dx - f*v*dx
+   dF = derivative(F, u, du)
+   goal = 0.5*u**2*dx
+
+   # Primal
+   solver, niter = newton(F, dF, u, bc)
+
+   # Adjoint with transpose of the Jacobian at u; the Newton iterations only
+   # factorized Jacobians at earlier iterates, so this is its only factorization
+   dJ = assemble(derivative(goal, u, v))
+   bc.apply(dJ)
+   z = Function(V)
+   solver.solve_transpose(z.vector(), dJ)
+
+   # Dual weighted residual
+   E  = FunctionSpace(mesh, "CG", 2)
+   Ez = Function(E)
+   Ez.extrapolate(z)
+   DirichletBC(E, Constant(0.0), DirichletBoundary).apply(Ez.vector())
+   DG = FunctionSpace(mesh, "DG", 0)
+   w  = TestFunction(DG)
+   eta = -assemble(replace(F, {v: (Ez - z)*w})).array()
+   est = np.sum(eta)
+
+   print("%5d %8d %6d %8d %16.10e %12.4e" %
+         (level, mesh.num_cells(), V.dim(), niter, assemble(goal), est))
+   if abs(est) < args.tol:
+      break
+
+   # Bulk marking: smallest set of cells with sum |eta| >= theta * total
+   aeta = np.abs(eta)
+   order = np.argsort(aeta)[::-1]
+   nmark = np.searchsorted(np.cumsum(aeta[order]), args.theta*np.sum(aeta)) + 1
+   marked = np.zeros(DG.dim(), dtype=bool)
+   marked[order[:nmark]] = True
+   cell_dofs = np.array([DG.dofmap().cell_dofs(c)[0] for c in range(mesh.num_cells())])
+   markers = CellFunction("bool", mesh)
+   markers.array()[:] = marked[cell_dofs]
+
+   uold = u
+   mesh = refine(mesh, markers)
+
+File("primal.pvd")  << u
+File("adjoint.pvd") << z
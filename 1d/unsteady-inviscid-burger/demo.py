@@ -6,6 +6,7 @@ Implemented in python from cpp demo by Johan Hake.
 """
 
 from dolfin import *
+from dg_mass import InverseMass
 
 # Sub domain for Dirichlet boundary condition
 class Boundary(SubDomain):
@@ -48,9 +49,8 @@ un = dot(u, n)
 # Numerical flux function - Roe flux
 Hn = 0.25*(un('+')**2 + un('-')**2) - 0.5*abs(un('+')+un('-'))*(u('-') - u('+'))
 
-# Mass matrix
-M = uh*phi*dx
-MMat = assemble(M)
+# Inverse of mass matrix, cell by cell
+Minv = InverseMass(V)
 
 dt = 0.005 # time step
 T  = 0.35  # final time
@@ -71,7 +71,7 @@ ufile << u
 while t < T + DOLFIN_EPS:
    rhs = assemble(R)
    uold.assign(u)
-   solve(MMat, u.vector(), rhs)
+   Minv.solve(u.vector(), rhs)
    t += dt
    print t
    ufile << u
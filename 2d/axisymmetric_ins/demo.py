@@ -1,12 +1,39 @@
 """
 Axisymmetric incompressible NS equations with swirl
 See Batchelor appendix for the equations
-"""
-from dolfin import *
 
-mu    = 0.01
+Default is one Newton solve from rigid rotation. With -ptc the steady state is
+computed by pseudo-transient continuation, with pseudo time step from switched
+evolution relaxation (SER) dtau_{k+1} = dtau_k |F_{k-1}|/|F_k|, together with
+continuation from (omg0, mu0) to (omg, mu): omg is varied linearly and mu
+geometrically in the continuation parameter s in [0,1]. Each stage starts from
+the last converged solution; failed stages are repeated with half the step in s.
 
-omg   = 10   # angular speed in rad/sec
+   python demo.py -ptc -omg 50 -mu 0.002
+"""
+from dolfin import *
+import argparse
+import sys
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-omg', type=float, help='Angular speed in rad/sec', default=10.0)
+parser.add_argument('-mu', type=float, help='Viscosity', default=0.01)
+parser.add_argument('-ptc', dest='ptc', action='store_true',
+                    help='Pseudo-transient continuation with continuation in omg/mu')
+parser.add_argument('-omg0', type=float, help='Starting omg for -ptc', default=10.0)
+parser.add_argument('-mu0', type=float, help='Starting mu for -ptc', default=0.01)
+parser.add_argument('-ds', type=float, help='Initial continuation step', default=0.25)
+parser.add_argument('-dtau', type=float, help='Initial pseudo time step', default=0.01)
+parser.add_argument('-maxsteps', type=int, help='Max pseudo time steps per stage', default=50)
+parser.set_defaults(ptc=False)
+args = parser.parse_args()
+
+if args.ptc:
+   mu  = Constant(args.mu0)
+   omg = args.omg0
+else:
+   mu  = Constant(args.mu)
+   omg = args.omg   # angular speed in rad/sec
 
 mesh = Mesh("annulus.xml")
 sub_domains = MeshFunction("uint", mesh, "subdomains.xml")
@@ -82,19 +109,103 @@ bc    = [ury_inner_bc, ury_outer_bc, ury_bottom_bc, ury_top_bc, \
          ut_inner_bc, ut_outer_bc, ut_bottom_bc, ut_top_bc, \
          p_bc]
 
-problem = NonlinearVariationalProblem(B, V, bc, dB)
-solver  = NonlinearVariationalSolver(problem)
-
-#solver.parameters["linear_solver"] = "gmres"
-#itsolver = solver.parameters["newton_solver"]
-#itsolver["absolute_tolerance"] = 1.0e-8
-
 fury = File("ury.pvd", "compressed")
 fut  = File("ut.pvd",  "compressed")
 fp   = File("p.pvd",   "compressed")
 
-solver.solve()
-ury,ut,p = V.split()
-fury << ury
-fut  << ut
-fp   << p
+def save():
+   ury,ut,p = V.split()
+   fury << ury
+   fut  << ut
+   fp   << p
+
+# Pseudo time term, only for velocity
+Vo    = Function(X)
+idtau = Constant(0.0)
+Bp  = B + idtau*r*((ur-Vo[0])*wr + (uy-Vo[1])*wy + (ut-Vo[2])*wt)*dx
+dBp = derivative(Bp, V, dV)
+
+# Newton corrections satisfy homogeneous bc
+bch = []
+for b in bc:
+   b0 = DirichletBC(b)
+   b0.homogenize()
+   bch.append(b0)
+dv = Function(X)
+
+def residual_norm():
+   b = assemble(B)
+   [b0.apply(b) for b0 in bch]
+   return b.norm("l2")
+
+def ptc_solve(atol=1.0e-10, rtol=1.0e-8, dtau_max=1.0e10):
+   """Returns (converged, no. of pseudo steps)"""
+   [b.apply(V.vector()) for b in bc]
+   res = res0 = residual_norm()
+   dtau = args.dtau
+   for k in range(args.maxsteps):
+      print "   PTC %3d  dtau = %10.3e  |F| = %12.4e" % (k, dtau, res)
+      if res < atol or res < rtol*res0:
+         return True, k
+      Vo.assign(V)
+      idtau.assign(1.0/dtau)
+      A, b = assemble_system(dBp, Bp, bch)
+      solve(A, dv.vector(), b)
+      V.vector().axpy(-1.0, dv.vector())
+      res_new = residual_norm()
+      if not res_new < 1.0e10*res0:
+         return False, k
+      # Switched evolution relaxation
+      dtau = min(dtau_max, dtau*res/res_new)
+      res = res_new
+   return False, args.maxsteps
+
+def set_parameters(s):
+   omg_s = args.omg0 + s*(args.omg - args.omg0)
+   mu_s  = args.mu0 * (args.mu/args.mu0)**s
+   ut_bc_value.omg = omg_s
+   mu.assign(mu_s)
+   return omg_s, mu_s
+
+if not args.ptc:
+   problem = NonlinearVariationalProblem(B, V, bc, dB)
+   solver  = NonlinearVariationalSolver(problem)
+
+   #solver.parameters["linear_solver"] = "gmres"
+   #itsolver = solver.parameters["newton_solver"]
+   #itsolver["absolute_tolerance"] = 1.0e-8
+
+   solver.solve()
+else:
+   Vs = Function(X)  # last converged solution
+   s, ds = 0.0, 0.0
+   while True:
+      s1 = min(1.0, s + ds)
+      omg_s, mu_s = set_parameters(s1)
+      print "Stage: s = %g, omg = %g, mu = %g" % (s1, omg_s, mu_s)
+      ok, nsteps = ptc_solve()
+      if ok:
+         print "Converged in %d pseudo steps" % nsteps
+         s = s1
+         Vs.assign(V)
+         if s >= 1.0:
+            break
+         if ds == 0.0:
+            ds = args.ds
+         elif nsteps < args.maxsteps/4:
+            ds = 2.0*ds
+      else:
+         if s1 == 0.0:
+            # no converged stage, keep existing output files
+            print "PTC failed at starting parameters, no solution saved"
+            sys.exit(1)
+         print "Not converged, reducing continuation step"
+         V.assign(Vs)
+         ds = 0.5*ds
+         if ds < 1.0e-4:
+            print "Continuation failed at s = %g" % s
+            break
+
+   V.assign(Vs)
+
+save()
@@ -4,6 +4,21 @@ Ref: Lars Pesch, "Discontinuous Galerkin Finite Element Methods for the
 Navier-Stokes Equations in Entropy Variable Formulatio", PhD Thesis
 """
 from dolfin import *
+import argparse
+from newton_krylov import NewtonKrylovSolver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-nk', dest='nk', action='store_true',
+                    help='Newton-GMRES with lagged Jacobian and Eisenstat-Walker tolerances')
+parser.add_argument('-pc', choices=['ilu','additive_schwarz'], default='ilu',
+                    help='Preconditioner for -nk')
+parser.add_argument('-max_rate', type=float, default=0.5,
+                    help='Refresh Jacobian if residual reduction is worse than this')
+parser.add_argument('-coeff', choices=['symbolic','DG0','CG1'], default='symbolic',
+                    help='Lagged stabilization coefficients: inline in forms or '
+                         'project into DG0/CG1 once per time step')
+parser.set_defaults(nk=False)
+args = parser.parse_args()
 
 degree = 1
 parameters['form_compiler']['quadrature_degree'] = 2*degree
@@ -184,13 +199,42 @@ tauY = as_matrix([\
       [-(H-ke)*taue, f3*ur,  f3*uy,  f3*ut,  taue                   ]  \
       ])
 
+# Lagged coefficients Ao, Ar*tauY and Ay*tauY are functions of vo only. They
+# can be projected into DG0/CG1 once per time step, which gives much smaller
+# kernels than inlining them into the forms; linearization is the same.
+if args.coeff != 'symbolic':
+   family, cdeg = ('DG', 0) if args.coeff == 'DG0' else ('CG', 1)
+   Tc = TensorFunctionSpace(mesh, family, cdeg, shape=(5,5))
+   Ao_h = Function(Tc)
+   Sr_h = Function(Tc)
+   Sy_h = Function(Tc)
+   Pt, St = TrialFunction(Tc), TestFunction(Tc)
+   Pmass  = assemble(inner(Pt,St)*dx)
+   Psolver = LUSolver(Pmass)
+   Psolver.parameters['reuse_factorization'] = True
+   Sr = replace(dot(Ar, tauY), {v:vo})
+   Sy = replace(dot(Ay, tauY), {v:vo})
+   Lproj = [(Ao_h, inner(Ao, St)*dx),
+            (Sr_h, inner(Sr, St)*dx),
+            (Sy_h, inner(Sy, St)*dx)]
+   Ao = Ao_h
+
+def update_coefficients():
+   if args.coeff == 'symbolic':
+      return
+   for f, L in Lproj:
+      Psolver.solve(f.vector(), assemble(L))
+
 RES   = as_vector(r*Ao[i,j]*(v[j]-vo[j])/dt + Ar[i,j]*Dx(r*v[j],0) \
                   + Ay[i,j]*Dx(r*v[j],1) - Dx(G[i,j],j) - S[i], i)
 
-# Ar and Ay must be transposed
-LW    = as_vector(Ar[j,i]*Dx(w[j],0) + Ay[j,i]*Dx(w[j],1), i)
-PSUP  = as_vector(LW[i]*tauY[i,j], j)
-PSUP  = replace(PSUP, {v:vo})
+if args.coeff == 'symbolic':
+   # Ar and Ay must be transposed
+   LW    = as_vector(Ar[j,i]*Dx(w[j],0) + Ay[j,i]*Dx(w[j],1), i)
+   PSUP  = as_vector(LW[i]*tauY[i,j], j)
+   PSUP  = replace(PSUP, {v:vo})
+else:
+   PSUP  = as_vector(Dx(w[i],0)*Sr_h[i,j] + Dx(w[i],1)*Sy_h[i,j], j)
 
 # For derivative, we consider SUPG terms as constant
 B_SUP = PSUP[i]*RES[i]*dx
@@ -210,13 +254,17 @@ ut_bc = DirichletBC(Vh.sub(2), ut_bc_value, Boundary)
 T_bc  = DirichletBC(Vh.sub(3), T_bc_value,  Boundary)
 bc    = [ur_bc, uy_bc, ut_bc, T_bc]
 
-problem = NonlinearVariationalProblem(B, v, bc, dB)
-solver  = NonlinearVariationalSolver(problem)
+if args.nk:
+   solver = NewtonKrylovSolver(B, v, bc, dB, pc=args.pc, max_rate=args.max_rate,
+                               atol=1.0e-8, rtol=1.0e-3)
+else:
+   problem = NonlinearVariationalProblem(B, v, bc, dB)
+   solver  = NonlinearVariationalSolver(problem)
 
-solver.parameters["linear_solver"] = "gmres"
-itsolver = solver.parameters["newton_solver"]
-itsolver["absolute_tolerance"] = 1.0e-8
-itsolver["relative_tolerance"] = 1.0e-3
+   solver.parameters["linear_solver"] = "gmres"
+   itsolver = solver.parameters["newton_solver"]
+   itsolver["absolute_tolerance"] = 1.0e-8
+   itsolver["relative_tolerance"] = 1.0e-3
 
 fp  = File("p.pvd",   "compressed")
 fry = File("vel.pvd", "compressed")
@@ -227,6 +275,7 @@ iter = 0
 t    = 0
 while t < Tf:
    vo.assign(v)
+   update_coefficients()
    solver.solve()
    t    = t + dt
    iter = iter + 1
@@ -238,3 +287,8 @@ while t < Tf:
       fry << velry
       fut << ut
       fT  << T
+
+if args.nk:
+   print "Newton iterations =", solver.niter, ", Jacobian refreshes =", \
+         solver.nrefresh, ", rejected steps =", solver.nreject, \
+         ", GMRES iterations =", solver.nlinear
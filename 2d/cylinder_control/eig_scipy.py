@@ -8,6 +8,7 @@ from dolfin import *
 import numpy as np
 import scipy.sparse as sps
 import scipy.sparse.linalg as la
+from dolfin_scipy import as_scipy
 
 parameters.linear_algebra_backend = "uBLAS"
 
@@ -89,16 +90,14 @@ F  = - inner(grad(u)*us, v)*dx      \
 Aa = assemble(F)
 
 # Convert to sparse format
-rows, cols, values = Aa.data()
-Aa = sps.csc_matrix((values, cols, rows))
+Aa = as_scipy(Aa)
 print "Size of Aa =",Aa.shape
 
 m  = inner(u,v)*dx
 Ma = assemble(m)
 
 # Convert to sparse format
-rows, cols, values = Ma.data()
-Ma = sps.csc_matrix((values, cols, rows))
+Ma = as_scipy(Ma)
 print "Size of Ma =",Ma.shape
 
 bcinds = []
@@ -0,0 +1,188 @@
+"""
+Python version of gain.m: compute feedback gain for the heat equation by
+solving a Riccati equation projected on the unstable subspace.
+
+State-space form
+
+   E dx/dt = A x + B u
+
+where x = (temperature, lagrange multiplier). One sparse LU of A is used for
+the shift-invert eigenvalue solve and, through a Woodbury update, for the
+closed-loop verification. Gain is saved into gain.mat which is read by heat.py
+
+   python gain.py                # read linear.mat written by linear.py
+   python gain.py -shift 29.6    # assemble linear system in memory
+"""
+import argparse
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sps
+import scipy.sparse.linalg as sla
+import scipy.io as sio
+
+def is_diag(A, tol=1.0e-10):
+    return np.max(np.abs(A - np.diag(np.diag(A)))) < tol
+
+class WoodburySolver():
+    """
+    Solve (A + U*V) x = b given sparse LU of A, where U is n x r and V is r x n.
+    The r solves for W = A^{-1} U are done once, in the constructor, and W is
+    stored as a dense n x r array; each solve then costs one LU solve plus
+    O(n r) work. b can be a vector or an n x k block.
+    """
+    def __init__(self, lu, U, V):
+        if sps.issparse(U):
+            U = U.toarray()
+        self.lu = lu
+        self.V  = V
+        self.W  = lu.solve(np.asarray(U, dtype=float))
+        C = np.eye(self.W.shape[1]) + V.dot(self.W)
+        self.C = la.lu_factor(np.asarray(C))
+
+    def solve(self, b):
+        y = self.lu.solve(b)
+        return y - self.W.dot(la.lu_solve(self.C, self.V.dot(y)))
+
+def compute_gain(E11, A11, A12, Mb, ne=10, mode='lqr'):
+    """
+    Returns gain K such that boundary control u = -K x stabilizes the system,
+    and eigenvalues of the full closed-loop system.
+    """
+    E11 = sps.csc_matrix(E11)
+    A11 = sps.csc_matrix(A11)
+    A12 = sps.csc_matrix(A12)
+    Mb  = np.asarray(sps.csc_matrix(Mb).todense())
+
+    # nt = no. of temp dofs
+    # nl = no. of lagrange mult
+    #    = no. of boundary control variables
+    nt, nl = A12.shape
+
+    A = sps.bmat([[A11, A12], [A12.T, None]], format='csc')
+    E = sps.bmat([[E11, None], [None, sps.csc_matrix((nl,nl))]], format='csc')
+    B = np.vstack([np.zeros((nt,nl)), -Mb])
+
+    # Factorize A once: used in eigenvalue solve and closed-loop check
+    lu = sla.splu(A)
+    OPinv = sla.LinearOperator(A.shape, matvec=lu.solve, dtype=float)
+
+    print('Eigenvalues of A,E')
+    D, V = sla.eigsh(A, k=ne, M=E, sigma=0.0, OPinv=OPinv, which='LM')
+    ii = np.argsort(D)[::-1]
+    D, V = D[ii], V[:,ii]
+    print('Eigenvalues/(pi*pi) =')
+    for d in D:
+        print('%f' % (d/np.pi**2))
+
+    # find unstable eig
+    iu = np.where(D > 0.0)[0]
+    nu = len(iu)
+    print('Number of unstable eigenvalues of A = %d' % nu)
+    assert nu > 0
+
+    # CHECK: Hautus test for unstable eigenvalues
+    h = B.T.dot(V[:,iu])
+    for i in range(nu):
+        print('Norm of hautus = %e' % np.linalg.norm(h[:,i]))
+
+    # Get unstable eigenvectors; A and E are symmetric so left and right
+    # eigenvectors are same.
+    Vt = V[:,iu]
+    Zt = V[:,iu].copy()
+
+    # CHECK: p must be diagonal
+    p = Vt.T.dot(E.dot(Zt))
+    assert np.min(np.abs(np.diag(p))) > 0.0
+    assert is_diag(p)
+    Zt = Zt / np.diag(p)
+
+    # Eigenvector corresponding to lagrange multiplier
+    Zp = Zt[nt:,:]
+    # Eigenvectors for temperature
+    Vy = Vt[:nt,:]
+    Zy = Zt[:nt,:]
+    B2 = Mb
+
+    # CHECK: orthonormality
+    p = Vy.T.dot(E11.dot(Zy))
+    assert np.max(np.abs(np.diag(p)-1.0)) < 1.0e-10
+    assert is_diag(p)
+
+    # Lifting of boundary control; all nl right hand sides in one solve
+    N   = sps.bmat([[E11, A12], [A12.T, None]], format='csc')
+    RHS = np.vstack([np.zeros((nt,nl)), B2])
+    Z1  = sla.splu(N).solve(RHS)
+    B12 = A11.dot(Z1[:nt,:])
+
+    # Project to unstable subspace
+    Au = Zy.T.dot(A11.dot(Vy))
+    Bu = Zy.T.dot(B12)
+
+    Ru = np.eye(nl)
+    if mode == 'min':
+        # minimal norm control
+        Qu = np.zeros(Au.shape)
+        print('Minimal norm feedback')
+    else:
+        # LQR problem
+        Qu = Vy.T.dot(E11.dot(Vy))
+        print('LQR feedback')
+
+    Pu = la.solve_continuous_are(Au, Bu, Qu, Ru)
+    L = la.eigvals(Au - Bu.dot(la.solve(Ru, Bu.T.dot(Pu))))
+    print('Eigenvalues of projected system with feedback')
+    print(L)
+    ePu = la.eigvalsh(Pu)
+    print('Eigenvalues of Pu')
+    print(ePu)
+
+    Kt = la.solve(Ru, (B.T.dot(Zt)).dot(Pu).dot(E11.dot(Zy).T))
+
+    # CHECK: are we stable now
+    # (A - B*S)^{-1} is applied using LU of A and Woodbury formula. The rank of
+    # B*S is nl, the number of boundary dofs, so this is not a small update:
+    # nl solves with A in the constructor, then one solve and O(n*nl) dense
+    # work for every application inside eigs.
+    S = np.hstack([Kt, np.zeros((nl,nl))])
+    cl = WoodburySolver(lu, -B, S)
+    Acl = sla.LinearOperator(A.shape, matvec=lambda x: A.dot(x) - B.dot(S.dot(x)),
+                             dtype=float)
+    OPinv = sla.LinearOperator(A.shape, matvec=cl.solve, dtype=float)
+    Dcl = sla.eigs(Acl, k=ne, M=E, sigma=0.0, OPinv=OPinv, which='LM',
+                   return_eigenvectors=False)
+    Dcl = Dcl[np.argsort(-np.real(Dcl))]
+    print('Eigenvalues/(pi*pi) of full system with feedback')
+    for d in Dcl:
+        print('%f %f' % (np.real(d)/np.pi**2, np.imag(d)/np.pi**2))
+    if np.max(np.real(Dcl)) >= 0.0:
+        raise RuntimeError('closed-loop system is not stable')
+
+    return Kt, np.max(ePu), Dcl
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-shift', type=float, default=None,
+                        help='Assemble system with this shift instead of reading linear.mat')
+    parser.add_argument('-mode', choices=['lqr','min'], default='lqr')
+    parser.add_argument('-ne', type=int, default=10,
+                        help='No. of eigenvalues to compute')
+    args = parser.parse_args()
+
+    if args.shift is None:
+        print('Reading linear.mat')
+        mats = sio.loadmat('linear.mat')
+    else:
+        from dolfin import Mesh
+        from linear import linear_system
+        mats = linear_system(Mesh('mesh.xml'), args.shift)
+
+    K, max_ePu, Dcl = compute_gain(mats['E11'], mats['A11'], mats['A12'],
+                                   mats['Mb'], ne=args.ne, mode=args.mode)
+
+    # save to file
+    fid = open('maxeig.dat','w')
+    fid.write('%24.14e' % max_ePu)
+    fid.close()
+
+    print('Saving gain into gain.mat')
+    sio.savemat('gain.mat', mdict={'K':K})
@@ -0,0 +1,87 @@
+"""
+Closed-loop simulation of many initial conditions at once. The K states are
+kept as an N x K block and advanced together with BDF2 using one factorization
+and multi-rhs triangular solves.
+
+First initial condition is eps*sin(pi x)*sin(pi y) as in heat.py, the others
+are random combinations of the modes sin(k pi x)*sin(l pi y), k,l <= kmax,
+scaled to have the same energy.
+
+Energy and control norm of all trajectories are saved into log_batch.npz
+"""
+import numpy as np
+import argparse
+import scipy.io as sio
+from dolfin import *
+from param import *
+from stepper import *
+
+parameters.linear_algebra_backend = "Eigen"
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-time', type=float, help='Final time', default=1.0)
+parser.add_argument('-dt', type=float, help='Time step', default=0.01)
+parser.add_argument('-nbatch', type=int, help='No. of initial conditions', default=100)
+parser.add_argument('-kmax', type=int, help='Max mode number', default=4)
+parser.add_argument('-seed', type=int, help='Random seed', default=1)
+parser.add_argument('-with_control', dest='control', action='store_true')
+parser.add_argument('-implicit', dest='implicit', action='store_true',
+                    help='Use feedback at new time level')
+parser.set_defaults(control=False, implicit=False)
+args = parser.parse_args()
+
+Tf = args.time
+dt = args.dt
+nb = args.nbatch
+
+mesh = Mesh('mesh.xml')
+V = FunctionSpace(mesh, 'CG', degree)
+
+gain = None
+if args.control:
+    print('Reading gain matrix from file')
+    gain = BoundaryGain(sio.loadmat('gain.mat')['K'])
+
+bd = boundary()
+bc = DirichletBC(V, 0.0, bd)
+stepper = HeatStepper(V, bc, dt, shift, gain, args.implicit)
+
+# Initial conditions: one per column
+eps = 1.0e-2
+x = V.tabulate_dof_coordinates().reshape((-1,2))
+u0 = np.zeros((V.dim(), nb))
+u0[:,0] = eps*np.sin(pi*x[:,0])*np.sin(pi*x[:,1])
+rng = np.random.RandomState(args.seed)
+for k in range(1,args.kmax+1):
+    for l in range(1,args.kmax+1):
+        mode = np.sin(k*pi*x[:,0])*np.sin(l*pi*x[:,1])
+        u0[:,1:] += np.outer(mode, rng.randn(nb-1))
+energy0 = stepper.energy(u0)
+u0[:,1:] *= energy0[0]/energy0[1:]
+energy0 = stepper.energy(u0)
+print('Initial energy = %12.6e' % energy0[0])
+
+nt = int(np.ceil(Tf/dt - 1.0e-12)) + 1
+time    = np.zeros(nt)
+energy  = np.zeros((nt, nb))
+control = np.zeros((nt, nb))
+
+# First time step: use BDF1
+it = 0
+energy[it] = energy0
+u1, ub = stepper.step(u0)
+it += 1
+time[it], energy[it], control[it] = it*dt, stepper.energy(u1), stepper.control_norm(ub)
+
+# Now use BDF2 for remaining steps
+while it < nt-1:
+    u2, ub = stepper.step(u1, u0)
+    it += 1
+    time[it] = it*dt
+    energy[it]  = stepper.energy(u2)
+    control[it] = stepper.control_norm(ub)
+    print('it,t,max energy = %5d %12.6e %12.6e' % (it,time[it],energy[it].max()))
+    u0, u1 = u1, u2
+
+print('Saving energy and control norms into log_batch.npz')
+np.savez('log_batch.npz', time=time, energy=energy, control=control)
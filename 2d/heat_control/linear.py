@@ -6,36 +6,42 @@ Exact eigenvalues are
 
 eig/pi^2 = -2, -5, -5, -8, -10, -10, -13, -13, -17, -17, -18, ...
 
-After running this program, run eigval.m in matlab.
+After running this program, run gain.py (or gain.m in matlab).
 """
 
 import scipy.io as sio
+from dolfin_scipy import as_scipy
 from dolfin import *
 from param import *
 
 parameters.linear_algebra_backend = "Eigen"
 
-mesh = Mesh('mesh.xml')
-V = FunctionSpace(mesh, 'CG', degree)
+def linear_system(mesh, shift):
+    V = FunctionSpace(mesh, 'CG', degree)
 
-u = TrialFunction(V)
-v = TestFunction(V)
+    u = TrialFunction(V)
+    v = TestFunction(V)
 
-M = assemble(u*v*dx)
-M = as_backend_type(M).sparray()
+    M = assemble(u*v*dx)
+    M = as_scipy(M)
 
-A = assemble(-inner(grad(u),grad(v))*dx + Constant(shift)*u*v*dx)
-A = as_backend_type(A).sparray()
+    A = assemble(-inner(grad(u),grad(v))*dx + Constant(shift)*u*v*dx)
+    A = as_scipy(A)
 
-# Boundary mass matrix
-N = assemble(u*v*ds)
+    # Boundary mass matrix
+    N = assemble(u*v*ds)
 
-bd = boundary()
-bc = DirichletBC(V, 0.0, bd)
-binds = bc.get_boundary_values().keys()
-N = as_backend_type(N).sparray()
-Mb= N[binds,:][:,binds] # boundary mass matrix
-N = N[:,:][:,binds]
+    bd = boundary()
+    bc = DirichletBC(V, 0.0, bd)
+    binds = list(bc.get_boundary_values().keys())
+    N = as_scipy(N)
+    Mb= N[binds,:][:,binds] # boundary mass matrix
+    N = N[:,binds]
 
-print 'Saving matrices into linear.mat'
-sio.savemat('linear.mat', mdict={'E11':M, 'A11':A, 'A12':N, 'Mb':Mb}, oned_as='column')
+    return {'E11':M, 'A11':A, 'A12':N, 'Mb':Mb}
+
+if __name__ == '__main__':
+    mesh = Mesh('mesh.xml')
+    mdict = linear_system(mesh, shift)
+    print('Saving matrices into linear.mat')
+    sio.savemat('linear.mat', mdict=mdict, oned_as='column')
@@ -0,0 +1,110 @@
+"""
+Pre-factorized BDF1/BDF2 time stepper for the heat equation with Dirichlet
+feedback control.
+
+The operators of both schemes are constant, so they are assembled and LU
+factorized once. Each time step is then one triangular solve and a few SpMV.
+Energy and control norms are computed from the mass and boundary mass
+matrices instead of assembling forms.
+
+The state can be a vector of size N or an N x K block of K trajectories, which
+are then advanced together using multi-rhs triangular solves.
+
+With implicit=True the feedback u_b = -K u is taken at the new time level, i.e.,
+boundary rows of the matrix become u_b + K u = 0. This low-rank modification is
+solved with the LU of the open-loop matrix and the Woodbury formula, which
+allows much larger time steps for strong gains.
+"""
+import numpy as np
+import scipy.sparse as sps
+import scipy.sparse.linalg as sla
+from dolfin_scipy import as_scipy
+from dolfin import *
+from gain import WoodburySolver
+
+class BoundaryGain():
+    """
+    Feedback u_b = -K u, where K has one row per boundary dof. K is stored as a
+    truncated SVD K = L*R with L of size nb x r and R of size r x N, so applying
+    it costs (nb+N)*r instead of nb*N. Singular values below tol*s_max are
+    dropped.
+    """
+    def __init__(self, K, tol=1.0e-12):
+        U, s, Vt = np.linalg.svd(np.asarray(K), full_matrices=False)
+        r = max(1, int(np.sum(s > tol*s[0])))
+        self.L = U[:,:r] * s[:r]
+        self.R = Vt[:r,:]
+        self.rank = r
+
+    def __call__(self, x):
+        return -np.dot(self.L, np.dot(self.R, x))
+
+class HeatStepper():
+    def __init__(self, V, bc, dt, shift, gain=None, implicit=False):
+        u, v = TrialFunction(V), TestFunction(V)
+
+        M = assemble(u*v*dx)
+        S = assemble(inner(grad(u),grad(v))*dx - Constant(shift)*u*v*dx)
+        N = assemble(u*v*ds)
+        M = as_scipy(M)
+        S = as_scipy(S)
+        N = as_scipy(N)
+
+        # Same ordering of boundary dofs as in linear.py
+        self.binds = np.array(list(bc.get_boundary_values().keys()),
+                              dtype=np.intc)
+        self.dt   = dt
+        self.M    = M
+        self.Mb   = N[self.binds,:][:,self.binds] # boundary mass matrix
+        self.gain = gain
+
+        # Dirichlet rows are replaced by identity rows, as in DirichletBC.apply
+        n = V.dim()
+        mask = np.ones(n); mask[self.binds] = 0.0
+        I = sps.diags(mask, 0, format='csr')
+        D = sps.diags(1.0-mask, 0, format='csr')
+        print('Factorizing BDF1 and BDF2 matrices')
+        self.lu1 = sla.splu((I*((1.0/dt)*M + S) + D).tocsc())
+        self.lu2 = sla.splu((I*((1.5/dt)*M + S) + D).tocsc())
+
+        self.implicit = implicit and gain is not None
+        if self.implicit:
+            # Boundary rows get + L*R, L*R = K
+            P = np.zeros((n, gain.rank))
+            P[self.binds,:] = gain.L
+            self.lu1 = WoodburySolver(self.lu1, P, gain.R)
+            self.lu2 = WoodburySolver(self.lu2, P, gain.R)
+
+    def control(self, x):
+        """Boundary values of control computed from state x"""
+        if self.gain is None:
+            return np.zeros((len(self.binds),) + np.shape(x)[1:])
+        return self.gain(x)
+
+    def step(self, x1, x0=None):
+        """
+        Advance from x1 (and x0 for BDF2) by one time step. If x0 is None,
+        BDF1 is used. Returns new solution and boundary control used.
+        """
+        if self.implicit:
+            ub = 0.0
+        else:
+            ub = self.control(x1)
+        if x0 is None:
+            b = self.M.dot(x1) / self.dt
+            lu = self.lu1
+        else:
+            b = self.M.dot(2.0*x1 - 0.5*x0) / self.dt
+            lu = self.lu2
+        b[self.binds] = ub
+        x = lu.solve(b)
+        if self.implicit:
+            ub = self.control(x)
+        return x, ub
+
+    def energy(self, x):
+        """L2 norm of x; one value per column if x is a block"""
+        return np.sqrt(np.sum(x * self.M.dot(x), axis=0))
+
+    def control_norm(self, ub):
+        return np.sqrt(np.sum(ub * self.Mb.dot(ub), axis=0))
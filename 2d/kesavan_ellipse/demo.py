@@ -1,4 +1,31 @@
+"""
+Poisson equation on region between two ellipses, adaptive refinement for the
+goal M(u) = int u dx.
+
+   python demo.py               # AdaptiveLinearVariationalSolver
+   python demo.py -mode warm    # own loop, see below
+
+In -mode warm primal and dual problems are solved with CG + AMG, starting from
+the solutions of the previous level interpolated to the refined mesh. Error
+indicators are dual weighted residuals with the quadratic extrapolation of the
+dual solution, which is set to zero on the Dirichlet boundary, and cells are
+marked by the bulk criterion. Time, dofs, Krylov iterations and error estimate
+of every level are saved in adapt.txt
+"""
 from dolfin import *
+import numpy as np
+import argparse
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-mode', choices=['dolfin','warm'], default='dolfin',
+                    help='Adaptive solver')
+parser.add_argument('-tol', type=float, default=1.0e-3, help='Tolerance on error in M')
+parser.add_argument('-theta', type=float, default=0.5, help='Bulk marking fraction')
+parser.add_argument('-maxlevel', type=int, default=20, help='Max refinement levels')
+parser.add_argument('-plot', dest='plot', action='store_true', help='Plot initial mesh')
+parser.set_defaults(plot=False)
+args = parser.parse_args()
 
 if not has_cgal():
     print "DOLFIN must be compiled with CGAL to run this demo."
@@ -19,8 +46,93 @@ g2d = e1 - e2
 
 mesh = Mesh(g2d, 40)
 print MeshQuality.radius_ratio_min_max(mesh)
-plot(mesh)
-interactive()
+if args.plot:
+    plot(mesh)
+    interactive()
+
+def krylov_solver(A):
+    """CG + AMG for A; the AMG hierarchy is built once and used for all solves"""
+    solver = KrylovSolver("cg", "amg")
+    solver.parameters["nonzero_initial_guess"] = True
+    solver.parameters["relative_tolerance"] = 1.0e-10
+    solver.set_operator(A)
+    return solver
+
+def adaptive_warm(mesh, tol):
+    """Adaptive loop with warm started Krylov solves, returns final u"""
+    uold, zold = None, None
+    rows = []
+    for level in range(args.maxlevel):
+        t0 = time.time()
+        V = FunctionSpace(mesh, 'CG', 1)
+        u = TrialFunction(V)
+        v = TestFunction(V)
+        a = inner(grad(u), grad(v))*dx
+        L = v*dx
+        bc = DirichletBC(V, 0, "on_boundary")
+
+        # Initial guesses from previous level
+        uh, z = Function(V), Function(V)
+        if uold is not None:
+            uold.set_allow_extrapolation(True)
+            zold.set_allow_extrapolation(True)
+            uh.interpolate(uold)
+            z.interpolate(zold)
+
+        # Primal; a is symmetric and dual problem has the same matrix, so
+        # one solver (and one AMG setup) serves both
+        A, b = assemble_system(a, L, bc)
+        solver = krylov_solver(A)
+        nprimal = solver.solve(uh.vector(), b)
+        # Dual with goal M(u) = int u dx
+        dM = assemble(v*dx)
+        bc.apply(dM)
+        ndual = solver.solve(z.vector(), dM)
+
+        # Dual weighted residual indicators
+        E  = FunctionSpace(mesh, 'CG', 2)
+        Ez = Function(E)
+        Ez.extrapolate(z)
+        DirichletBC(E, 0, "on_boundary").apply(Ez.vector())
+        DG = FunctionSpace(mesh, 'DG', 0)
+        w  = TestFunction(DG)
+        r  = L - replace(a, {u: uh})
+        eta = assemble(replace(r, {v: (Ez - z)*w})).array()
+        est = np.sum(eta)
+        Mu  = assemble(uh*dx)
+        rows.append((level, mesh.num_cells(), V.dim(), nprimal, ndual,
+                     time.time() - t0, Mu, est))
+        print "level = %d, dofs = %d, M(u) = %e, estimate = %e" % \
+              (level, V.dim(), Mu, est)
+        if abs(est) < tol:
+            break
+
+        # Bulk marking
+        aeta  = np.abs(eta)
+        order = np.argsort(aeta)[::-1]
+        nmark = np.searchsorted(np.cumsum(aeta[order]), args.theta*np.sum(aeta)) + 1
+        marked = np.zeros(DG.dim(), dtype=bool)
+        marked[order[:nmark]] = True
+        cell_dofs = np.array([DG.dofmap().cell_dofs(c)[0] for c in range(mesh.num_cells())])
+        markers = CellFunction("bool", mesh)
+        markers.array()[:] = marked[cell_dofs]
+
+        uold, zold = uh, z
+        mesh = refine(mesh, markers)
+
+    f = open('adapt.txt', 'w')
+    f.write('%5s %8s %8s %8s %8s %10s %16s %12s\n' %
+            ('level','cells','dofs','primal','dual','time','M(u)','estimate'))
+    for row in rows:
+        f.write('%5d %8d %8d %8d %8d %10.3f %16.10e %12.4e\n' % row)
+    f.close()
+    print open('adapt.txt').read()
+    return uh
+
+if args.mode == 'warm':
+    uh = adaptive_warm(mesh, args.tol)
+    File("sol_final.pvd") << uh
+    exit(0)
 
 V = FunctionSpace(mesh, 'CG', 1)
 u = TrialFunction(V)
@@ -35,7 +147,7 @@ u = Function(V)
 
 # Functional
 M = u*dx
-tol = 1.0e-3
+tol = args.tol
 
 # Solve equation a = L with respect to u and the given boundary
 # conditions, such that the estimated error (measured in M) is less
@@ -13,6 +13,7 @@ TREATING INHOMOGENEOUS ESSENTIAL BOUNDARY CONDITIONS IN FINITE ELEMENT METHODS A
 SIAM J. Num. Anal., vol. 20, no. 2, pp. 390-424, April 1992
 """
 from scipy.sparse.linalg import cg
+from dolfin_scipy import as_scipy
 from dolfin import *
 
 parameters.linear_algebra_backend = "Eigen"
@@ -39,7 +40,7 @@ b = assemble(uexact*v*ds)
 bd = boundary()
 bc = DirichletBC(V, ubc, bd)
 binds = bc.get_boundary_values().keys()
-M = as_backend_type(M).sparray()
+M = as_scipy(M)
 M = M[binds,:][:,binds]
 rhs = b[binds]
 
@@ -11,6 +11,7 @@ After running this program, run eigval.m in matlab.
 
 from scipy.sparse.linalg import cg
 import scipy.io as sio
+from dolfin_scipy import as_scipy
 from dolfin import *
 
 parameters.linear_algebra_backend = "Eigen"
@@ -30,10 +31,10 @@ u = TrialFunction(V)
 v = TestFunction(V)
 
 M = assemble(u*v*dx)
-M = as_backend_type(M).sparray()
+M = as_scipy(M)
 
 A = assemble(-inner(grad(u),grad(v))*dx + Constant(shift)*u*v*dx)
-A = as_backend_type(A).sparray()
+A = as_scipy(A)
 
 # Boundary mass matrix
 N = assemble(u*v*ds)
@@ -41,9 +42,9 @@ N = assemble(u*v*ds)
 bd = boundary()
 bc = DirichletBC(V, 0.0, bd)
 binds = bc.get_boundary_values().keys()
-N = as_backend_type(N).sparray()
+N = as_scipy(N)
 Mb= N[binds,:][:,binds] # boundary mass matrix
-N = N[:,:][:,binds]
+N = N[:,binds]
 
 print "Saving matrices into linear.mat"
 sio.savemat('linear.mat', mdict={'M':M, 'A':A, 'N':N, 'Mb':Mb}, oned_as='column')
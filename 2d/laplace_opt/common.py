@@ -0,0 +1,248 @@
+"""
+Laplace problem with piecewise constant diffusion coefficient
+
+   -div(kappa grad(u)) = 0,  u = g on boundary,  kappa = 1 + sum_i K_i chi_i
+
+where chi_i are DG0 indicator functions of the regions. The stiffness matrix is
+affine in K
+
+   a(K) = A0 + sum_i K_i A_i
+
+and A0, A_i are assembled only once (AffineLaplace). For each K there is one
+combination and one factorization, which is used for the forward, sensitivity
+and adjoint solves: a(K) is symmetric and all of them have the same Dirichlet
+rows.
+
+For many regions, or one parameter per cell, RegionLaplace assembles a(K) with
+kappa as a DG0 function, and the gradient w.r.t. all parameters comes from one
+cellwise assembly of grad(u).grad(phi) which is summed over the regions.
+"""
+from dolfin import *
+import numpy
+import scipy.sparse as sps
+
+# Circular regions where kappa jumps: centers and radius
+centers = [(0.0, 0.0), (-3.0, 0.0), (0.0, -3.0)]
+radius  = 1.0
+
+# Boundary
+def Boundary(x, on_boundary):
+   return on_boundary
+
+def dof_midpoints(V0):
+   """Cell midpoints in the order of DG0 dofs"""
+   xm = numpy.zeros((V0.dim(), 2))
+   dofmap = V0.dofmap()
+   for cell in cells(V0.mesh()):
+      x = cell.midpoint()
+      xm[dofmap.cell_dofs(cell.index())[0]] = x.x(), x.y()
+   return xm
+
+def indicator(V0, inside):
+   """DG0 function which is 1 in cells whose midpoint satisfies inside(x,y)"""
+   xm  = dof_midpoints(V0)
+   chi = Function(V0)
+   chi.vector()[:] = numpy.where(inside(xm[:,0], xm[:,1]), 1.0, 0.0)
+   return chi
+
+def circle_indicators(V0):
+   return [indicator(V0, lambda x, y, c=c: (x-c[0])**2 + (y-c[1])**2 < radius**2)
+           for c in centers]
+
+def circle_regions(V0):
+   """Region number of each DG0 dof: i in circle i, -1 outside"""
+   xm = dof_midpoints(V0)
+   region = -numpy.ones(V0.dim(), dtype=int)
+   for i, c in enumerate(centers):
+      region[(xm[:,0]-c[0])**2 + (xm[:,1]-c[1])**2 < radius**2] = i
+   return region
+
+def grid_regions(V0, n):
+   """n x n blocks of the bounding box, numbered row-wise"""
+   xm = dof_midpoints(V0)
+   lo = xm.min(axis=0)
+   hi = xm.max(axis=0)
+   ij = numpy.floor(n*(xm - lo)/(hi - lo)).astype(int)
+   ij = numpy.minimum(ij, n-1)
+   return ij[:,1]*n + ij[:,0]
+
+class LaplaceProblem():
+   """
+   Common part: derived classes give the matrix a(K) in operator(K) and the
+   derivatives of a(u,phi) w.r.t. K in sensitivity(u, phi).
+   """
+   def __init__(self, V, g):
+      u = TrialFunction(V)
+      v = TestFunction(V)
+      self.V  = V
+      self.M  = assemble(u*v*dx)
+      self.bc  = DirichletBC(V, g, Boundary)
+      self.bc0 = DirichletBC(V, 0, Boundary)
+
+      self.u = Function(V)  # solution for current K
+      self.K = None
+      self.b = self.u.vector().copy()  # work vectors
+      self.w = self.u.vector().copy()
+      self.x = self.u.vector().copy()
+
+      # Counters
+      self.nfact = 0
+      self.nsolve = 0
+
+   def set_parameters(self, K):
+      """Form and factorize a(K), then solve forward problem. Nothing is done
+      if K has not changed."""
+      K = numpy.array(K, dtype=float)
+      if self.K is not None and numpy.array_equal(K, self.K):
+         return
+      A = self.operator(K)
+      self.bc.apply(A)
+      self.A = A
+      self.solver = LUSolver(A)
+      self.solver.parameters['reuse_factorization'] = True
+      self.K = K
+      self.nfact += 1
+
+      self.b.zero()
+      self.bc.apply(self.b)
+      self.solve(self.u.vector(), self.b)
+
+   def solve(self, x, b):
+      self.solver.solve(x, b)
+      self.nsolve += 1
+
+   def solve_homogeneous(self, x, b):
+      self.bc0.apply(b)
+      self.solve(x, b)
+
+   def misfit(self, K, ud):
+      """Sets w = M*(u - ud) and returns u - ud"""
+      self.set_parameters(K)
+      e = self.u.vector() - ud.vector()
+      self.M.mult(e, self.w)
+      return e
+
+   def objective(self, K, ud):
+      e = self.misfit(K, ud)
+      return 0.5*e.inner(self.w)
+
+   def gradient_adjoint(self, K, ud):
+      """Gradient from the adjoint problem a(phi, v) = -(u - ud, v)"""
+      self.misfit(K, ud)
+      self.b[:] = self.w
+      self.b *= -1.0
+      self.solve_homogeneous(self.x, self.b)
+      return self.sensitivity(self.u.vector(), self.x)
+
+class AffineLaplace(LaplaceProblem):
+   def __init__(self, V, chis, g):
+      LaplaceProblem.__init__(self, V, g)
+      u = TrialFunction(V)
+      v = TestFunction(V)
+      self.chis = chis
+      self.A0 = assemble(inner(grad(u), grad(v))*dx)
+      self.Ai = [assemble(chi*inner(grad(u), grad(v))*dx) for chi in chis]
+
+   def kappa(self, K):
+      """kappa as DG0 function"""
+      kappa = Function(self.chis[0].function_space())
+      kappa.vector()[:] = 1.0
+      for Ki, chi in zip(K, self.chis):
+         kappa.vector().axpy(Ki, chi.vector())
+      return kappa
+
+   def operator(self, K):
+      A = self.A0.copy()
+      for Ki, Ai in zip(K, self.Ai):
+         A.axpy(Ki, Ai, True)
+      return A
+
+   def sensitivity(self, u, phi):
+      G = numpy.zeros(len(self.Ai))
+      for i, Ai in enumerate(self.Ai):
+         Ai.mult(u, self.b)
+         G[i] = phi.inner(self.b)
+      return G
+
+   def gradient_linear(self, K, ud):
+      """Gradient from the linearized problems a(du_i, v) = -(chi_i grad(u), grad(v))"""
+      self.misfit(K, ud)
+      G = numpy.zeros(len(self.Ai))
+      for i, Ai in enumerate(self.Ai):
+         Ai.mult(self.u.vector(), self.b)
+         self.b *= -1.0
+         self.solve_homogeneous(self.x, self.b)
+         G[i] = self.w.inner(self.x)
+      return G
+
+class RegionLaplace(LaplaceProblem):
+   """
+   kappa = 1 + K_i in region i; region is an integer array over the DG0 dofs
+   with values in [0, nregion) or -1 where kappa = 1 is fixed. Each K needs
+   one assembly of a(K); the gradient needs one DG0 assembly.
+   """
+   def __init__(self, V, V0, region, g, nregion=None):
+      LaplaceProblem.__init__(self, V, g)
+      if nregion is None:
+         nregion = region.max() + 1
+      self.nregion = nregion
+      inside = numpy.where(region >= 0)[0]
+      self.R = sps.csr_matrix((numpy.ones(len(inside)), (inside, region[inside])),
+                              shape=(V0.dim(), nregion))
+
+      u = TrialFunction(V)
+      v = TestFunction(V)
+      self.kappa_h = Function(V0)
+      self.a = self.kappa_h*inner(grad(u), grad(v))*dx
+
+      self.phi = Function(V)
+      self.w0  = TestFunction(V0)
+      self.dA  = inner(grad(self.u), grad(self.phi))*self.w0*dx
+
+   def kappa(self, K):
+      """kappa as DG0 function"""
+      kappa = Function(self.kappa_h.function_space())
+      kappa.vector()[:] = 1.0 + self.R.dot(K)
+      return kappa
+
+   def operator(self, K):
+      self.kappa_h.vector()[:] = 1.0 + self.R.dot(K)
+      return assemble(self.a)
+
+   def sensitivity(self, u, phi):
+      self.phi.vector()[:] = phi
+      g = assemble(self.dA).array()
+      return self.R.T.dot(g)
+
+class CachedObjective():
+   """
+   Objective J(K) and gradient dJ(K), each computed at most once for a given
+   K. Optimizers usually ask for both at the same point; since the forward
+   solve is also kept by the problem, every K costs one forward solve.
+   """
+   def __init__(self, J, dJ):
+      self.J  = J
+      self.dJ = dJ
+      self.cache = {}
+      self.nJ  = 0
+      self.ndJ = 0
+
+   def entry(self, K):
+      key = tuple(numpy.array(K, dtype=float))
+      if key not in self.cache:
+         self.cache[key] = {}
+      return self.cache[key]
+
+   def value(self, K):
+      c = self.entry(K)
+      if 'J' not in c:
+         c['J'] = self.J(K)
+         self.nJ += 1
+      return c['J']
+
+   def gradient(self, K):
+      c = self.entry(K)
+      if 'dJ' not in c:
+         c['dJ'] = numpy.array(self.dJ(K))
+         self.ndJ += 1
+      return c['dJ']
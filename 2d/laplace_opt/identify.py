@@ -0,0 +1,86 @@
+"""
+Identify piecewise constant kappa = 1 + K_i in N regions from the solution of
+the problem in demo.py (kappa jumps 2, 3, 4 in the three circles).
+
+Regions are the three circles, n x n blocks of the domain, or every cell. The
+gradient w.r.t. all K_i costs one forward solve, one adjoint solve and one DG0
+assembly, independent of the number of regions. Tikhonov regularization
+0.5*alpha*|K|^2 is added to the misfit, which is needed for many regions.
+
+python identify.py -regions grid -n 8 -alpha 1e-6
+python identify.py -regions cells -alpha 1e-5
+"""
+from dolfin import *
+import numpy
+import argparse
+from scipy.optimize import minimize
+from common import *
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-regions', choices=['circles','grid','cells'], default='grid',
+                    help='Regions with constant kappa')
+parser.add_argument('-n', type=int, default=8, help='Blocks in each direction for grid')
+parser.add_argument('-alpha', type=float, default=0.0, help='Regularization parameter')
+parser.add_argument('-kmin', type=float, default=-0.9,
+                    help='Lower bound on kappa jumps, kappa >= 1 + kmin')
+parser.add_argument('-kmax', type=float, default=None,
+                    help='Upper bound on kappa jumps')
+parser.add_argument('-maxiter', type=int, default=500, help='Max L-BFGS-B iterations')
+args = parser.parse_args()
+
+set_log_level(100)
+
+mesh = Mesh('circle.xml')
+V  = FunctionSpace(mesh, 'CG', 1)
+V0 = FunctionSpace(mesh, 'DG', 0)
+g  = Expression('pow(x[0],3) - pow(x[1],3)')
+
+# Target solution
+target = RegionLaplace(V, V0, circle_regions(V0), g, len(centers))
+target.set_parameters([2.0, 3.0, 4.0])
+ud = Function(V)
+ud.assign(target.u)
+File('kappa_desired.pvd') << target.kappa([2.0, 3.0, 4.0])
+
+if args.regions == 'circles':
+   region = circle_regions(V0)
+   nregion = len(centers)
+elif args.regions == 'grid':
+   region = grid_regions(V0, args.n)
+   nregion = args.n**2
+else:
+   region = numpy.arange(V0.dim())
+   nregion = V0.dim()
+problem = RegionLaplace(V, V0, region, g, nregion)
+print "Number of parameters =", nregion
+
+def J(K):
+   return problem.objective(K, ud) + 0.5*args.alpha*numpy.dot(K, K)
+
+def dJ(K):
+   return problem.gradient_adjoint(K, ud) + args.alpha*K
+
+objective = CachedObjective(J, dJ)
+
+iter = [0]
+def callback(K):
+   iter[0] += 1
+   print "Iteration = %4d  J = %14.6e  |dJ| = %12.4e" % \
+         (iter[0], objective.value(K), numpy.linalg.norm(objective.gradient(K)))
+
+K = numpy.zeros(nregion)
+bounds = [(args.kmin, args.kmax)]*nregion
+res = minimize(objective.value, K, jac=objective.gradient, method='L-BFGS-B',
+               bounds=bounds, callback=callback,
+               options={'gtol': 1.0e-8, 'ftol': 1.0e-14, 'maxiter': args.maxiter})
+print res.message
+K = res.x
+problem.set_parameters(K)
+
+print "Objective evaluations =", objective.nJ, ", gradient evaluations =", objective.ndJ
+print "Factorizations =", problem.nfact, ", solves =", problem.nsolve
+if nregion <= 10:
+   print "Identified K =", K
+
+File('kappa_identified.pvd') << problem.kappa(K)
+File('sol_identified.pvd')   << problem.u
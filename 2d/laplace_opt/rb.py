@@ -0,0 +1,202 @@
+"""
+Reduced basis surrogate for J(K) of demo.py
+
+The stiffness matrix and, after lifting of the boundary values, the right hand
+side are affine in K
+
+   A(K) = A_0 + sum_i K_i A_i,   f(K) = f_0 + sum_i K_i f_i
+
+Offline: a basis Z is built greedily from truth solutions at the training
+point with largest error estimate
+
+   Delta(K) = |f(K) - A(K) Z c|_{X'} / alpha_LB(K),  X = A_0,
+   alpha_LB(K) = min(1, 1 + min_i K_i)
+
+which bounds the error in the X (energy) norm; the dual norm of the residual
+is evaluated from a precomputed Gram matrix of the affine residual terms.
+
+Online: J(K), its gradient and Delta(K) need only N x N matrices, i.e., the
+cost is O(N^3) independent of the mesh.
+
+python rb.py -tol 1e-6 -Nmax 30
+"""
+from dolfin import *
+import numpy as np
+import argparse
+import scipy.sparse.linalg as sla
+from scipy.optimize import minimize
+from common import *
+from dolfin_scipy import as_scipy
+
+class ReducedBasis():
+   def __init__(self, Aq, fq, Mff, md, m0):
+      """
+      Aq, fq : affine terms on free dofs, q = 0 is the parameter independent one
+      Mff    : mass matrix on free dofs
+      md, m0 : J = 0.5 u.Mff.u + u.md + m0 for free part u of solution
+      """
+      self.Aq  = [A.tocsr() for A in Aq]
+      self.fq  = [np.asarray(f) for f in fq]
+      self.Mff = Mff.tocsr()
+      self.md  = md
+      self.m0  = m0
+      self.nf  = self.Aq[0].shape[0]
+      self.Xlu = sla.splu(self.Aq[0].tocsc())
+      self.Z   = np.zeros((self.nf, 0))
+      self.ntruth = 0
+      # X^{-1} f_q, part of the residual Gram matrix which does not change
+      self.Xf = np.column_stack([self.Xlu.solve(f) for f in self.fq])
+
+   @staticmethod
+   def from_problem(problem, ud):
+      """Affine data from AffineLaplace and target solution ud"""
+      A = [as_scipy(problem.A0).tocsr()] + [as_scipy(Ai).tocsr() for Ai in problem.Ai]
+      M = as_scipy(problem.M).tocsr()
+      bv = problem.bc.get_boundary_values()
+      bdofs = np.array(list(bv.keys()), dtype=int)
+      gb = np.array([bv[i] for i in bdofs])
+      free = np.setdiff1d(np.arange(A[0].shape[0]), bdofs)
+      Aq = [Ai[free,:][:,free] for Ai in A]
+      fq = [-Ai[free,:][:,bdofs].dot(gb) for Ai in A]
+      # d = lifting - ud
+      d = -ud.vector().array()
+      d[bdofs] += gb
+      Md = M.dot(d)
+      rb = ReducedBasis(Aq, fq, M[free,:][:,free], Md[free], 0.5*np.dot(d, Md))
+      rb.free = free
+      rb.bdofs, rb.gb = bdofs, gb
+      return rb
+
+   def theta(self, K):
+      return np.concatenate(([1.0], K))
+
+   def truth(self, K):
+      th = self.theta(K)
+      A = th[0]*self.Aq[0]
+      f = th[0]*self.fq[0]
+      for q in range(1, len(self.Aq)):
+         A = A + th[q]*self.Aq[q]
+         f = f + th[q]*self.fq[q]
+      self.ntruth += 1
+      return sla.spsolve(A.tocsc(), f)
+
+   def truth_objective(self, K):
+      u = self.truth(K)
+      return 0.5*np.dot(u, self.Mff.dot(u)) + np.dot(u, self.md) + self.m0
+
+   def add(self, u):
+      """Add u to the basis, orthonormal in X"""
+      X = self.Aq[0]
+      for i in range(2):
+         u = u - self.Z.dot(self.Z.T.dot(X.dot(u)))
+      u = u/np.sqrt(np.dot(u, X.dot(u)))
+      self.Z = np.column_stack((self.Z, u))
+      self.update()
+
+   def update(self):
+      Z = self.Z
+      self.AN = [Z.T.dot(A.dot(Z)) for A in self.Aq]
+      self.fN = [Z.T.dot(f) for f in self.fq]
+      self.MN = Z.T.dot(self.Mff.dot(Z))
+      self.mN = Z.T.dot(self.md)
+      # Residual terms: f_q and A_q Z, Gram matrix in X^{-1} inner product
+      AZ = [A.dot(Z) for A in self.Aq]
+      R  = np.column_stack(self.fq + AZ)
+      XR = np.column_stack([self.Xf] + [self.Xlu.solve(B) for B in AZ])
+      self.G = R.T.dot(XR)
+      self.G = 0.5*(self.G + self.G.T)
+
+   @property
+   def N(self):
+      return self.Z.shape[1]
+
+   def solve(self, K):
+      th = self.theta(K)
+      AN = sum(t*A for t, A in zip(th, self.AN))
+      fN = sum(t*f for t, f in zip(th, self.fN))
+      return AN, np.linalg.solve(AN, fN)
+
+   def objective(self, K):
+      AN, c = self.solve(K)
+      return 0.5*np.dot(c, self.MN.dot(c)) + np.dot(c, self.mN) + self.m0
+
+   def gradient(self, K):
+      """Reduced adjoint: A_N lam = MN c + mN, dJ/dK_i = lam.(f_i - A_i c)"""
+      AN, c = self.solve(K)
+      lam = np.linalg.solve(AN.T, self.MN.dot(c) + self.mN)
+      return np.array([np.dot(lam, self.fN[q] - self.AN[q].dot(c))
+                       for q in range(1, len(self.AN))])
+
+   def estimate(self, K):
+      """Error bound in X norm and X norm of reduced solution"""
+      th = self.theta(K)
+      AN, c = self.solve(K)
+      beta = np.concatenate([th] + [-t*c for t in th])
+      res2 = max(np.dot(beta, self.G.dot(beta)), 0.0)
+      alpha = min(1.0, 1.0 + np.min(K))
+      return np.sqrt(res2)/alpha, np.linalg.norm(c)
+
+   def greedy(self, train, tol, Nmax):
+      """Relative error bound below tol on all training points"""
+      K = train[0]
+      for it in range(Nmax):
+         self.add(self.truth(K))
+         est = np.zeros(len(train))
+         for j, Kj in enumerate(train):
+            delta, unorm = self.estimate(Kj)
+            est[j] = delta/max(unorm, 1.0e-14)
+         jmax = np.argmax(est)
+         print("N = %3d   max relative error bound = %12.4e" % (self.N, est[jmax]))
+         if est[jmax] < tol:
+            break
+         K = train[jmax]
+      return est[jmax]
+
+if __name__ == "__main__":
+   parser = argparse.ArgumentParser()
+   parser.add_argument('-tol', type=float, default=1.0e-6, help='Greedy tolerance')
+   parser.add_argument('-Nmax', type=int, default=30, help='Max size of basis')
+   parser.add_argument('-ntrain', type=int, default=1000, help='Training set size')
+   parser.add_argument('-kmin', type=float, default=-0.5, help='Lower bound of K')
+   parser.add_argument('-kmax', type=float, default=10.0, help='Upper bound of K')
+   parser.add_argument('-seed', type=int, default=1, help='Random seed')
+   args = parser.parse_args()
+
+   set_log_level(100)
+
+   mesh = Mesh('circle.xml')
+   V  = FunctionSpace(mesh, 'CG', 1)
+   V0 = FunctionSpace(mesh, 'DG', 0)
+   g  = Expression('pow(x[0],3) - pow(x[1],3)')
+   problem = AffineLaplace(V, circle_indicators(V0), g)
+   nK = len(centers)
+
+   # Target solution, same as in demo.py
+   Kd = np.array([2.0, 3.0, 4.0])
+   ud = Function(V)
+   problem.set_parameters(Kd)
+   ud.assign(problem.u)
+
+   # Offline
+   rb = ReducedBasis.from_problem(problem, ud)
+   rng = np.random.RandomState(args.seed)
+   train = args.kmin + (args.kmax - args.kmin)*rng.rand(args.ntrain, nK)
+   train[0] = 0.5*(args.kmin + args.kmax)
+   rb.greedy(train, args.tol, args.Nmax)
+   print("Truth solves in offline stage = %d" % rb.ntruth)
+
+   # Check against truth on some random points
+   print("%-36s %14s %14s %12s" % ("K", "J truth", "J rb", "bound"))
+   for K in args.kmin + (args.kmax - args.kmin)*rng.rand(5, nK):
+      delta, unorm = rb.estimate(K)
+      print("%-36s %14.6e %14.6e %12.4e" % (np.array2string(K, precision=3),
+            rb.truth_objective(K), rb.objective(K), delta))
+
+   # Online optimization with the surrogate
+   objective = CachedObjective(rb.objective, rb.gradient)
+   res = minimize(objective.value, np.zeros(nK), jac=objective.gradient,
+                  method='L-BFGS-B', bounds=[(args.kmin, args.kmax)]*nK,
+                  options={'gtol': 1.0e-10, 'ftol': 1.0e-16})
+   print(res.message)
+   print("Optimized K = %s" % res.x)
+   print("Objective evaluations = %d" % objective.nJ)
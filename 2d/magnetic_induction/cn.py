@@ -14,81 +14,13 @@ from dolfin import *
 import math
 import numpy
 import argparse
-
-def BForm(B,v,u,g,n):
-   Fl = as_tensor(B[i]*u[j]-B[j]*u[i],(i,j))
-   un = dot(u,n)
-   Bn = dot(B,n)
-   unp = 0.5*(un+abs(un))
-   unm = 0.5*(un-abs(un))
-   H =  unp('+')*B('+') + unm('+')*B('-') - u('+')*inner(avg(B),n('+'))
-   Hb = B*unp + g*unm - u*Bn
-   F1 = -inner(Fl, grad(v))*dx + dot(u,v)*div(B)*dx \
-      + inner(H,jump(v))*dS - 2*dot(avg(u),avg(v))*avg(dot(B,n))*dS + inner(Hb,v)*ds
-   return F1
+from induction import *
 
 def solve_induction(degree,np,itsave):
    mesh = UnitSquareMesh(np, np)
-   X = VectorFunctionSpace(mesh, "DG", degree)
-
-   B = TrialFunction(X)
-   v = TestFunction(X)
-
-   B1 = Function(X)
-   # Velocity field
-   u = Expression(("-x[1]", "x[0]"))
-   # Exact solution
-   ge = (("4.0*(-x[1]+0.5*sin(t))*exp(-20*(x[0]*x[0]+x[1]*x[1]-(x[0]*cos(t)+x[1]*sin(t))+0.25))",
-         "4.0*(x[0]-0.5*cos(t))*exp(-20*(x[0]*x[0]+x[1]*x[1]-(x[0]*cos(t)+x[1]*sin(t))+0.25))"))
-   g = Expression(ge,t=0.0)
-
-   # Set initial condition
-   B0 = interpolate(g, X)
-   B1 = Function(X)
-
-   # Save initial condition to file
-   fsol = File("sol.pvd")
-   B1.assign(B0)
-   fsol << B1
-
-   T = 0.5*pi
    h = 1.0/np
    dt = 0.5 * h
-   N = int(T/dt)
-   dt = T/N
-   n = FacetNormal(mesh)
-
-   Bt= 0.5*(B + B0)
-   F = inner(B-B0,v)*dx + dt*BForm(Bt,v,u,g,n)
-   
-   a = lhs(F)
-   L = rhs(F)
-   A  = PETScMatrix(); assemble(a, tensor=A)
-   solver = LUSolver(A)
-   solver.parameters['reuse_factorization'] = True
-
-   it, t = 0, 0.0
-   while t < T:
-      g.t = t + 0.5*dt
-      b = assemble(L)
-      solver.solve(B1.vector(), b)
-      B0.assign(B1)
-      it += 1; t += dt
-      print "it, dt, t = ", it, dt, t
-      if it%itsave == 0:
-         fsol << B1
-
-   # Compute error norms
-   Be = Expression(ge,t=t)
-   err_l2 = errornorm(Be, B1, 'l2')
-   Bd = div(B1)**2*dx
-   div_l2 = sqrt(assemble(Bd))
-   # Save error into file
-   Berr = Function(X)
-   Bex  = interpolate(Be, X)
-   Berr.vector()[:] = B1.vector() - Bex.vector()
-   File("Berr.pvd") << Berr
-   return div_l2, err_l2
+   return run(mesh, degree, BForm, 'cn', dt, itsave)
 
 if __name__ == "__main__" :
    parser = argparse.ArgumentParser()
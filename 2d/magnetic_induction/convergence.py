@@ -0,0 +1,127 @@
+"""
+Convergence study for the induction equation solvers
+
+Runs all combinations of (scheme, degree, N) on a pool of processes, largest
+cases first, and collects L2 error, divergence error, wall time and number of
+dofs into one table. Completed cases are stored in a cache file, so an
+interrupted study is resumed by running the same command again.
+
+Each case runs in its own directory runs/<scheme>_deg<degree>_N<N> where the
+solution files and the solver output (log.txt) are saved. A case which fails
+is reported, its traceback is in log.txt, and it is left out of the table and
+the cache, so it is run again next time.
+
+   python ./convergence.py -schemes ssprk3 bdf2 -deg 1 2 -N 20 40 80 -np 4
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import importlib
+import traceback
+import multiprocessing
+
+schemes = ['ssprk3', 'bdf2', 'bdf3', 'cn', 'resistive_bdf2']
+srcdir  = os.path.dirname(os.path.abspath(__file__))
+
+def key(case):
+   return '%s %d %d' % case
+
+def ndofs(degree, N):
+   # vector DG on UnitSquareMesh(N,N) which has 2*N*N triangles
+   return 2 * 2*N*N * (degree+1)*(degree+2)//2
+
+def cost(case):
+   # dofs times no. of time steps, dt is proportional to h
+   scheme, degree, N = case
+   return ndofs(degree, N) * N
+
+def run_case(case):
+   scheme, degree, N = case
+   rundir = os.path.join('runs', '%s_deg%d_N%d' % case)
+   if not os.path.isdir(rundir):
+      os.makedirs(rundir)
+   os.chdir(rundir)
+   # send all solver output, also from C++, to log file
+   sys.stdout.flush()
+   flog = open('log.txt', 'w')
+   os.dup2(flog.fileno(), 1)
+   sys.path.insert(0, srcdir)
+   try:
+      solver = importlib.import_module(scheme)
+      t0 = time.time()
+      div_l2, err_l2 = solver.solve_induction(degree, N, 1000000)
+      wtime = time.time() - t0
+      r = {'err': err_l2, 'div': div_l2, 'time': wtime, 'dofs': ndofs(degree, N)}
+   except Exception:
+      traceback.print_exc(file=sys.stdout)
+      r = None
+   sys.stdout.flush()
+   flog.close()
+   return case, r
+
+def rate(e1, e2):
+   return math.log(e1/e2)/math.log(2)
+
+def write_table(results, cases, fname):
+   f = open(fname, 'w')
+   f.write('%-15s %3s %5s %10s %14s %6s %14s %6s %10s\n' %
+           ('scheme','deg','N','dofs','L2 error','rate','div error','rate','time (s)'))
+   for scheme in sorted(set(c[0] for c in cases)):
+      for degree in sorted(set(c[1] for c in cases)):
+         Ns = sorted(set(c[2] for c in cases if c[0]==scheme and c[1]==degree))
+         prev = None
+         for N in Ns:
+            r = results.get(key((scheme,degree,N)))
+            if r is None:
+               prev = None
+               continue
+            p = q = '-'
+            if prev is not None:
+               p = '%6.2f' % rate(prev['err'], r['err'])
+               q = '%6.2f' % rate(prev['div'], r['div'])
+            f.write('%-15s %3d %5d %10d %14.6e %6s %14.6e %6s %10.1f\n' %
+                    (scheme, degree, N, r['dofs'], r['err'], p, r['div'], q,
+                     r['time']))
+            prev = r
+   f.close()
+   print(open(fname).read())
+
+if __name__ == "__main__" :
+   parser = argparse.ArgumentParser()
+   parser.add_argument('-schemes',nargs='+',choices=schemes,default=schemes)
+   parser.add_argument('-deg',type=int,nargs='+',help='Degrees of polynomial space',default=[1,2,3])
+   parser.add_argument('-N',type=int,nargs='+',help='No. of cells e.g., 20 40 80',required=True)
+   parser.add_argument('-np',type=int,help='No. of processes',default=multiprocessing.cpu_count())
+   parser.add_argument('-cache',help='File with completed cases',default='convergence.json')
+   parser.add_argument('-o',help='Output table',default='convergence.txt')
+   args = parser.parse_args()
+
+   results = {}
+   if os.path.isfile(args.cache):
+      results = json.load(open(args.cache))
+      print('Read %d completed cases from %s' % (len(results), args.cache))
+
+   cases = [(s,d,N) for s in args.schemes for d in args.deg for N in args.N]
+   todo  = [c for c in cases if key(c) not in results]
+   todo.sort(key=cost, reverse=True)
+   print('Cases to run = %d' % len(todo))
+
+   if len(todo) > 0:
+      # fresh process for every case
+      pool = multiprocessing.Pool(min(args.np, len(todo)), maxtasksperchild=1)
+      for case, r in pool.imap_unordered(run_case, todo):
+         if r is None:
+            print('%-15s deg = %d  N = %4d  FAILED, see log.txt' % case)
+            continue
+         results[key(case)] = r
+         with open(args.cache, 'w') as f:
+            json.dump(results, f, indent=1)
+         print('%-15s deg = %d  N = %4d  err = %e  div = %e  time = %.1f' %
+               (case + (r['err'], r['div'], r['time'])))
+      pool.close()
+      pool.join()
+
+   write_table(results, cases, args.o)
@@ -0,0 +1,72 @@
+"""
+Common parts of the induction equation solvers: DG form, exact solution and
+the time loop, which uses TimeIntegrator from utils/timestepping.py
+Authors: Tanmay Sarkar, Praveen C
+"""
+from dolfin import *
+from timestepping import TimeIntegrator
+
+# Exact solution
+ge = (("4.0*(-x[1]+0.5*sin(t))*exp(-20*(x[0]*x[0]+x[1]*x[1]-(x[0]*cos(t)+x[1]*sin(t))+0.25))",
+      "4.0*(x[0]-0.5*cos(t))*exp(-20*(x[0]*x[0]+x[1]*x[1]-(x[0]*cos(t)+x[1]*sin(t))+0.25))"))
+
+def BForm(B,v,u,g,n):
+   Fl = as_tensor(B[i]*u[j]-B[j]*u[i],(i,j))
+   un = dot(u,n)
+   Bn = dot(B,n)
+   unp = 0.5*(un+abs(un))
+   unm = 0.5*(un-abs(un))
+   H =  unp('+')*B('+') + unm('+')*B('-') - u('+')*inner(avg(B),n('+'))
+   Hb = B*unp + g*unm - u*Bn
+   F1 = -inner(Fl, grad(v))*dx + dot(u,v)*div(B)*dx \
+      + inner(H,jump(v))*dS - 2*dot(avg(u),avg(v))*avg(dot(B,n))*dS + inner(Hb,v)*ds
+   return F1
+
+def run(mesh, degree, form, scheme, dt, itsave):
+   """
+   Solve upto T = pi/2 with time step close to dt. form(B,v,u,g,n) gives the
+   spatial DG form. Returns divergence and L2 error norms.
+   """
+   X = VectorFunctionSpace(mesh, "DG", degree)
+   v = TestFunction(X)
+
+   # Velocity field
+   u = Expression(("-x[1]", "x[0]"))
+   g = Expression(ge,t=0.0)
+   n = FacetNormal(mesh)
+
+   # Set initial condition
+   B0 = interpolate(g, X)
+
+   # Save initial condition to file
+   fsol = File("sol.pvd")
+   fsol << B0
+
+   T = 0.5*pi
+   N = int(T/dt)
+   dt = T/N
+
+   def set_time(t):
+      g.t = t
+
+   ti = TimeIntegrator(X, lambda B: form(B,v,u,g,n), B0, dt, scheme,
+                       set_time=set_time)
+   while ti.t < T:
+      ti.step()
+      print("it, dt, t = %d %g %g" % (ti.it, dt, ti.t))
+      if ti.it%itsave == 0:
+         fsol << ti.solution
+   B1 = ti.solution
+   t  = ti.t
+
+   # Compute error norms
+   Be = Expression(ge,t=t)
+   err_l2 = errornorm(Be, B1, 'l2')
+   Bd = div(B1)**2*dx
+   div_l2 = sqrt(assemble(Bd))
+   # Save error into file
+   Berr = Function(X)
+   Bex  = interpolate(Be, X)
+   Berr.vector()[:] = B1.vector() - Bex.vector()
+   File("Berr.pvd") << Berr
+   return div_l2, err_l2
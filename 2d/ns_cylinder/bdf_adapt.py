@@ -0,0 +1,19 @@
+"""
+Unsteady flow with adaptive time step, variable order BDF
+   python bdf_adapt.py -tol 1e-3
+"""
+import argparse
+from ns import *
+from param import *
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-tol', type=float, help='Tolerance on local error', default=1.0e-3)
+parser.add_argument('-dt', type=float, help='Initial time step', default=1.0e-3)
+parser.add_argument('-Tf', type=float, help='Final time', default=50.0)
+parser.add_argument('-kmax', type=int, choices=[1,2,3], help='Maximum BDF order', default=3)
+parser.add_argument('-dtmax', type=float, help='Maximum time step', default=0.1)
+args = parser.parse_args()
+
+problem = NSProblem(Re, udeg)
+problem.run_bdf_adaptive(tol=args.tol, dt=args.dt, Tf=args.Tf, kmax=args.kmax,
+                         dtmax=args.dtmax)
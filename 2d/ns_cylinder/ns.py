@@ -4,6 +4,9 @@ import numpy as np
 import scipy.sparse as sps
 import scipy.sparse.linalg as sla
 import scipy.io as sio
+from dolfin_scipy import as_scipy
+from timestepping import lagrange_coefficients, \
+                         lagrange_derivative_coefficients, bdf_error_constants
 
 # position of blowing/suction slots
 # NOTE: This must be same as in the geo file.
@@ -213,16 +216,14 @@ class NSProblem():
         Aa = assemble(F)
 
         # Convert to sparse format
-        rows, cols, values = Aa.data()
-        Aa = sps.csc_matrix((values, cols, rows))
+        Aa = as_scipy(Aa)
         print "Size of Aa =",Aa.shape
 
         m  = inner(u,v)*dx
         Ma = assemble(m)
 
         # Convert to sparse format
-        rows, cols, values = Ma.data()
-        Ma = sps.csc_matrix((values, cols, rows))
+        Ma = as_scipy(Ma)
         print "Size of Ma =",Ma.shape
 
         bcinds = []
@@ -484,3 +485,142 @@ class NSProblem():
             if it%50 == 0:
                 u,p = up2.split()
                 fu << u
+
+    def run_bdf_adaptive(self, tol=1.0e-3, dt=1.0e-3, Tf=50.0, kmax=3,
+                         dtmin=1.0e-6, dtmax=0.1):
+        """
+        Flow over cylinder in channel
+        Variable step, variable coefficient BDF1-3 with extrapolated convection
+        velocity. Order is raised from 1 to kmax as solutions become available;
+        only the first step (BDF1) is taken without error control.
+        Local truncation error is estimated from the difference between the BDF
+        solution and the extrapolation of k+1 previous solutions (Milne device)
+
+           err = C_k/(C_k + 1) * |u - u_pred|/|u|
+
+        A step with err > tol is rejected and repeated with smaller dt. After
+        every step dt is set from err with the usual controller.
+        """
+        # Solutions, newest first: ups[0] = u^n, ups[1] = u^{n-1}, ...
+        ups  = [Function(self.W) for j in range(kmax+1)]
+        up   = Function(self.W)  # u^{n+1}
+        upp  = Function(self.W)  # predictor for u^{n+1}
+        times= [0.0 for j in range(kmax+1)]
+        nhist= 1                 # no. of valid solutions in ups
+
+        # Trial functions
+        u,p = TrialFunctions(self.W)
+
+        # Test functions
+        v,q = TestFunctions(self.W)
+
+        # These are used to estimate cfl number
+        DG   = FunctionSpace(self.mesh, 'DG', 0)
+        vdg  = TestFunction(DG)
+        h    = [cell.diameter() for cell in cells(self.mesh)]
+        area = [cell.volume()   for cell in cells(self.mesh)]
+
+        nu = self.viscosity_coefficient()
+
+        File("steady/steady.xml") >> ups[0].vector()
+        uh = [as_vector((w[0], w[1])) for w in ups]
+        un = as_vector((up[0], up[1]))
+        du = as_vector((up[0]-upp[0], up[1]-upp[1]))
+
+        # BDF and extrapolation coefficients, set in every step. Unused ones
+        # are zero so that one form works for all orders and step sizes.
+        c = [Constant(0.0) for j in range(kmax+1)]
+        e = [Constant(0.0) for j in range(kmax)]
+        dudt = c[0]*u + sum([c[j+1]*uh[j] for j in range(kmax)])
+        uext = sum([e[j]*uh[j] for j in range(kmax)])
+
+        F = inner(dudt, v)*dx                \
+            + inner(grad(u)*uext, v)*dx      \
+            - p*div(v)*dx                    \
+            + nu*inner(grad(u), grad(v))*dx  \
+            - q*div(u)*dx
+
+        a, L  = lhs(F), rhs(F)
+        err_form  = inner(du, du)*dx
+        norm_form = inner(un, un)*dx
+
+        t, it, nrej = 0.0, 0, 0
+
+        ffile = open('force.dat', 'w')
+        cd, cl = self.compute_forces(nu, uh[0], ups[0][2])
+        force=str(it)+" "+str(t)+" "+str(cl)+" "+str(cd)+" "+str(dt)+"\n"
+        ffile.write(force); ffile.flush()
+
+        fu = File("solvtk/u.pvd")
+
+        A = PETScMatrix()
+        b = PETScVector()
+
+        while t < Tf:
+            dt = min(dt, Tf - t)
+            # highest order for which the error can be estimated
+            k  = max(1, min(kmax, nhist-1))
+            tn = t + dt
+
+            # estimate cfl number
+            uavg = assemble(sqrt(uh[0][0]**2+uh[0][1]**2)*vdg*dx)
+            uavg = uavg.array()/area
+            cfl  = dt * max(uavg/h)
+
+            cb = lagrange_derivative_coefficients(tn, [tn] + times[:k])
+            ce = lagrange_coefficients(tn, times[:k])
+            for j in range(kmax+1):
+                c[j].assign(cb[j] if j <= k else 0.0)
+            for j in range(kmax):
+                e[j].assign(ce[j] if j < k else 0.0)
+
+            assemble(a, tensor=A)
+            assemble(L, tensor=b)
+            [bc.apply(A,b) for bc in self.bcs]
+            solver = LUSolver(A)
+            solver.solve(up.vector(), b)
+
+            # Error estimate needs k+1 previous solutions
+            if nhist > k:
+                cp = lagrange_coefficients(tn, times[:k+1])
+                upp.vector().zero()
+                for j in range(k+1):
+                    upp.vector().axpy(cp[j], ups[j].vector())
+                Ck  = bdf_error_constants[k]
+                err = Ck/(Ck + 1.0) * sqrt(assemble(err_form)
+                                           / max(assemble(norm_form), 1.0e-14))
+                fac = 0.9*(tol/max(err, 1.0e-14))**(1.0/(k+1))
+            else:
+                err, fac = 0.0, 1.0
+
+            if err > tol and dt > dtmin:
+                nrej += 1
+                print("it = %6d,   t = %12.6e,   dt = %12.3e,   k = %d,   err = %12.3e  rejected"
+                      % (it+1,tn,dt,k,err))
+                dt = max(dtmin, dt*max(0.2, fac))
+                continue
+
+            # Accept step: shift solutions
+            for j in range(kmax, 0, -1):
+                ups[j].assign(ups[j-1])
+                times[j] = times[j-1]
+            ups[0].assign(up)
+            times[0] = tn
+            nhist = min(nhist+1, kmax+1)
+            t = tn; it += 1
+            print("it = %6d,   t = %12.6e,   dt = %12.3e,   k = %d,   err = %12.3e,   cfl = %12.3e"
+                  % (it,t,dt,k,err,cfl))
+
+            # Compute lift/drag and store in arrays
+            cd, cl = self.compute_forces(nu, uh[0], ups[0][2])
+            force=str(it)+" "+str(t)+" "+str(cl)+" "+str(cd)+" "+str(dt)+"\n"
+            ffile.write(force); ffile.flush()
+            if it%50 == 0:
+                u,p = ups[0].split()
+                fu << u
+
+            # Limit growth of step since BDF2/3 are not zero-stable for large
+            # step ratios
+            dt = min(dtmax, dt*min(1.2, max(0.2, fac)))
+
+        print("Accepted steps = %d,   rejected steps = %d" % (it, nrej))
@@ -6,31 +6,7 @@ DOES NOT WORK YET
 
 from dolfin import *
 
-# Material properties
-mu_o   = 1.0
-mu_w   = 1.0
-pinlet = 1.0
-poutlet= 0.0
-sinlet = 1.0
-cinlet = 0.0
-
-class Inlet(SubDomain):
-   def inside(self, x, on_boundary):
-      return ((x[0] < DOLFIN_EPS and x[1]-0.1 < DOLFIN_EPS) or \
-              (x[1] < DOLFIN_EPS and x[0]-0.1 < DOLFIN_EPS)) and \
-             on_boundary
-
-class Outlet(SubDomain):
-   def inside(self, x, on_boundary):
-      return ((x[0]-1 > -DOLFIN_EPS and x[1]-0.9 > -DOLFIN_EPS) or \
-              (x[1]-1 > -DOLFIN_EPS and x[0]-0.9 > -DOLFIN_EPS)) and \
-             on_boundary
-
-def mobility_water(s):
-   return s**2/mu_w
-
-def mobility_oil(s):
-   return (1-s)**2/mu_o
+from param import *
 
 def dflu1(sl, sr, cl, cr, vn):
    if vn > 0.0:
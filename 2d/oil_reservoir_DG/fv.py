@@ -0,0 +1,124 @@
+"""
+Finite volume kernel for explicit DG0 transport of s and s*c
+
+Facet-to-cell adjacency, facet normals and lengths and the gradients of the P1
+pressure basis functions are computed once and stored as numpy arrays. Upwind
+(DFLU) fluxes of all facets are then evaluated in vectorized form and cell
+values are updated directly, without any form assembly.
+
+   fv = FVTransport(V, Q, sub_domains)
+   fv.set_velocity(p.vector().array(), lam.vector().array())
+   dt = cfl * fv.max_dt(dfmax)
+   fv.step(s, m, dt)          # s, m are DG0 vector arrays, updated in place
+
+Inlet facets are marked 0 (inflow state sinlet, cinlet), outlet facets 1
+(outflow, interior state); on other boundary facets there is no flux.
+"""
+from dolfin import *
+import numpy as np
+from param import frac_flow, sinlet, cinlet
+
+class FVTransport():
+   def __init__(self, V, Q, sub_domains):
+      mesh = V.mesh()
+      assert mesh.topology().dim() == 2
+      mesh.init(1, 2)
+      x     = mesh.coordinates()
+      cells = mesh.cells()
+      ncell = mesh.num_cells()
+
+      # DG0 dof of each cell, P1 dofs of each cell (in local vertex order)
+      self.dof  = np.array([V.dofmap().cell_dofs(c)[0] for c in range(ncell)])
+      self.pdof = np.array([Q.dofmap().cell_dofs(c) for c in range(ncell)])
+
+      # Gradients of P1 basis functions, grad_phi[c,i,:], and cell areas
+      X  = x[cells]
+      J  = np.stack((X[:,1,:] - X[:,0,:], X[:,2,:] - X[:,0,:]), axis=2)
+      Gref = np.array([[-1.0, -1.0], [1.0, 0.0], [0.0, 1.0]])
+      self.grad_phi = np.einsum('ik,ckj->cij', Gref, np.linalg.inv(J))
+      self.area = np.zeros(ncell)
+      self.area[self.dof] = 0.5*np.abs(np.linalg.det(J))
+      centroid = X.mean(axis=1)
+
+      # Facets: cells on two sides (c1 = -1 on boundary), marker, unit normal
+      # pointing from c0 to c1 (outward on boundary), length
+      markers = sub_domains.array()
+      nf = mesh.num_facets()
+      fc = -np.ones((nf, 2), dtype=int)
+      fvert = np.zeros((nf, 2), dtype=int)
+      for f in facets(mesh):
+         cs = f.entities(2)
+         fc[f.index(), :len(cs)] = cs
+         fvert[f.index()] = f.entities(0)
+      tang = x[fvert[:,1]] - x[fvert[:,0]]
+      length = np.sqrt(np.sum(tang**2, axis=1))
+      normal = np.column_stack((tang[:,1], -tang[:,0])) / length[:,None]
+      mid  = 0.5*(x[fvert[:,0]] + x[fvert[:,1]])
+      flip = np.sum((mid - centroid[fc[:,0]])*normal, axis=1) < 0.0
+      normal[flip] *= -1.0
+
+      interior = fc[:,1] >= 0
+      self.c0 = fc[interior,0]; self.c1 = fc[interior,1]
+      self.n  = normal[interior]; self.len = length[interior]
+      self.i0 = self.dof[self.c0]; self.i1 = self.dof[self.c1]
+
+      inlet  = np.logical_and(~interior, markers == 0)
+      outlet = np.logical_and(~interior, markers == 1)
+      self.bc = {}
+      for name, fb in [('inlet', inlet), ('outlet', outlet)]:
+         c = fc[fb,0]
+         self.bc[name] = (c, self.dof[c], normal[fb], length[fb])
+
+      self.ncell = ncell
+      self.vn = None
+
+   def set_velocity(self, p, lam):
+      """
+      v = -lam*grad(p) in each cell, from P1 pressure dofs p and DG0 total
+      mobility lam. Normal velocity on interior facets is the average of the
+      two cells, as in avg(v).n
+      """
+      gp = np.einsum('cij,ci->cj', self.grad_phi, p[self.pdof])
+      v  = -lam[self.dof][:,None]*gp
+      self.vn = 0.5*np.sum((v[self.c0] + v[self.c1])*self.n, axis=1)
+      self.vnb = {}
+      for name, (c, i, n, l) in self.bc.items():
+         self.vnb[name] = np.sum(v[c]*n, axis=1)
+
+   def max_dt(self, dfmax):
+      """Largest stable dt for unit CFL number; dfmax = max of f'(s)"""
+      w = self.vn*self.len
+      vsum = np.bincount(self.i0, np.abs(w), self.ncell) \
+           + np.bincount(self.i1, np.abs(w), self.ncell)
+      for name, (c, i, n, l) in self.bc.items():
+         vsum += np.bincount(i, np.abs(self.vnb[name])*l, self.ncell)
+      return np.min(self.area/(dfmax*np.maximum(vsum, 1.0e-14)))
+
+   def residual(self, s, m):
+      """Sum of upwind fluxes of s and s*c out of each cell"""
+      fs = frac_flow(s)
+      c  = np.where(s > 1.0e-12, m/np.maximum(s, 1.0e-12), 0.0)
+      up = np.where(self.vn > 0.0, self.i0, self.i1)
+      Hs = self.vn*self.len*fs[up]
+      Hm = Hs*c[up]
+      rs = np.bincount(self.i0, Hs, self.ncell) - np.bincount(self.i1, Hs, self.ncell)
+      rm = np.bincount(self.i0, Hm, self.ncell) - np.bincount(self.i1, Hm, self.ncell)
+
+      c0, i, n, l = self.bc['inlet']
+      vnb = self.vnb['inlet']
+      fin = np.where(vnb < 0.0, frac_flow(sinlet), fs[i])
+      cin = np.where(vnb < 0.0, cinlet, c[i])
+      rs += np.bincount(i, vnb*l*fin, self.ncell)
+      rm += np.bincount(i, vnb*l*fin*cin, self.ncell)
+
+      c0, i, n, l = self.bc['outlet']
+      vnb = self.vnb['outlet']
+      rs += np.bincount(i, vnb*l*fs[i], self.ncell)
+      rm += np.bincount(i, vnb*l*fs[i]*c[i], self.ncell)
+      return rs, rm
+
+   def step(self, s, m, dt):
+      """Forward Euler step, s and m are updated in place"""
+      rs, rm = self.residual(s, m)
+      s -= dt*rs/self.area
+      m -= dt*rm/self.area
@@ -0,0 +1,109 @@
+"""
+2-D oil reservoir problem, IMPES scheme
+Author: Praveen. C
+
+Pressure (CG1) is solved implicitly with CG + AMG using the total mobility of
+the last pressure solve; the solve is repeated every k transport steps, or
+earlier if the total mobility has changed by more than a relative threshold.
+Saturation s and s*c (DG0) are updated explicitly with the upwind flux
+
+   H = vn * f(s_up),  s_up = upwind value w.r.t. vn = v.n,  v = -lam grad(p)
+
+with time step from CFL condition, which is recomputed after every pressure
+solve. Transport steps use the numpy kernel in fv.py, no form assembly is done
+between pressure solves. To get help
+
+   python impes.py -h
+"""
+from dolfin import *
+import numpy as np
+import argparse
+from param import *
+from fv import FVTransport
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-N', type=int, help='No. of cells in each direction', default=50)
+parser.add_argument('-T', type=float, help='Final time', default=0.5)
+parser.add_argument('-cfl', type=float, help='CFL number', default=0.5)
+parser.add_argument('-k', type=int, help='Pressure solve every k steps', default=10)
+parser.add_argument('-lt_tol', type=float, help='Relative change in total mobility '
+                    'which forces a pressure solve', default=0.1)
+parser.add_argument('-s', type=int, help='Interval to save results', default=50)
+args = parser.parse_args()
+
+mesh = UnitSquareMesh(args.N, args.N)
+sub_domains = boundary_parts(mesh)
+
+# Saturation, s*c and total mobility used in pressure equation
+V  = FunctionSpace(mesh, "DG", 0)
+s  = Function(V)
+m  = Function(V)
+c  = Function(V)
+lam= Function(V)
+
+# Pressure
+Q = FunctionSpace(mesh, "CG", 1)
+q = TrialFunction(Q)
+r = TestFunction(Q)
+p = Function(Q)
+
+pa = lam*inner(grad(q), grad(r))*dx
+pL = Constant(0)*r*dx
+pbc_inlet  = DirichletBC(Q, pinlet,  sub_domains, 0)
+pbc_outlet = DirichletBC(Q, poutlet, sub_domains, 1)
+pbc = [pbc_inlet, pbc_outlet]
+
+psolver = KrylovSolver("cg", "amg")
+psolver.parameters["nonzero_initial_guess"] = True
+psolver.parameters["relative_tolerance"] = 1.0e-10
+
+# Explicit finite volume transport, see fv.py
+fv = FVTransport(V, Q, sub_domains)
+
+# Max of f'(s)
+ss = np.linspace(0.0, 1.0, 1001)
+dfmax = np.max(np.abs(np.diff(frac_flow(ss))/np.diff(ss)))
+
+def solve_pressure():
+   lam.vector()[:] = mobility_total(s.vector().array())
+   A, b = assemble_system(pa, pL, pbc)
+   psolver.set_operator(A)
+   niter = psolver.solve(p.vector(), b)
+   fv.set_velocity(p.vector().array(), lam.vector().array())
+   dt = args.cfl * fv.max_dt(dfmax)
+   return niter, dt
+
+fp = File("p.pvd", "compressed")
+fsat = File("s.pvd", "compressed")
+fc = File("c.pvd", "compressed")
+
+t, it, npres = 0.0, 0, 0
+last = 0
+while t < args.T:
+   # Pressure solve, if it is time or mobility has changed too much
+   lt_old = lam.vector().array()
+   lt_new = mobility_total(s.vector().array())
+   change = np.max(np.abs(lt_new - lt_old))/np.max(np.abs(lt_new))
+   if it == 0 or it - last >= args.k or change > args.lt_tol:
+      niter, dt = solve_pressure()
+      npres += 1
+      last  = it
+      print("Pressure solve %d: CG iterations = %d, dt = %e" % (npres, niter, dt))
+   dt1 = min(dt, args.T - t)
+
+   # Explicit upwind update of s and s*c
+   sa = s.vector().array()
+   ma = m.vector().array()
+   fv.step(sa, ma, dt1)
+   s.vector()[:] = sa
+   m.vector()[:] = ma
+
+   t += dt1; it += 1
+   print("iter = %d, t = %e" % (it, t))
+   if it % args.s == 0:
+      c.vector()[:] = np.where(sa > 1.0e-12, ma/np.maximum(sa, 1.0e-12), 0.0)
+      fp << p
+      fsat << s
+      fc << c
+
+print("Transport steps = %d, pressure solves = %d" % (it, npres))
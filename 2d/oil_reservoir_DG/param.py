@@ -0,0 +1,45 @@
+"""
+Material properties, boundary parts and mobilities for the oil reservoir problem
+"""
+from dolfin import *
+
+# Material properties
+mu_o   = 1.0
+mu_w   = 1.0
+pinlet = 1.0
+poutlet= 0.0
+sinlet = 1.0
+cinlet = 0.0
+
+class Inlet(SubDomain):
+   def inside(self, x, on_boundary):
+      return ((x[0] < DOLFIN_EPS and x[1]-0.1 < DOLFIN_EPS) or \
+              (x[1] < DOLFIN_EPS and x[0]-0.1 < DOLFIN_EPS)) and \
+             on_boundary
+
+class Outlet(SubDomain):
+   def inside(self, x, on_boundary):
+      return ((x[0]-1 > -DOLFIN_EPS and x[1]-0.9 > -DOLFIN_EPS) or \
+              (x[1]-1 > -DOLFIN_EPS and x[0]-0.9 > -DOLFIN_EPS)) and \
+             on_boundary
+
+# These work on UFL expressions and on numpy arrays
+def mobility_water(s):
+   return s**2/mu_w
+
+def mobility_oil(s):
+   return (1-s)**2/mu_o
+
+def mobility_total(s):
+   return mobility_water(s) + mobility_oil(s)
+
+def frac_flow(s):
+   return mobility_water(s)/mobility_total(s)
+
+def boundary_parts(mesh):
+   """Inlet is marked 0, outlet 1 and rest of boundary 100"""
+   sub_domains = MeshFunction("size_t", mesh, mesh.topology().dim() - 1)
+   sub_domains.set_all(100)
+   Inlet().mark(sub_domains, 0)
+   Outlet().mark(sub_domains, 1)
+   return sub_domains
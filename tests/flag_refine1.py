@@ -3,31 +3,19 @@
 2) Flag and cell and its neighbors and refine
 """
 from dolfin import *
+import numpy as np
 import matplotlib.pyplot as plt
+from mesh_marking import cell_adjacency, expand, cell_markers
 
-# Set-up mesh and connectivity
+# Set-up mesh and cell neighbours
 mesh = UnitSquareMesh(5,5)
-tdim = mesh.topology().dim()
-mesh.init(tdim - 1, tdim)
+adj  = cell_adjacency(mesh)
 
-flag1 = CellFunction("bool", mesh)
-flag2 = CellFunction("bool", mesh)
+marked = np.zeros(mesh.num_cells(), dtype=bool)
+marked[15] = True
 
-for cell in cells(mesh):
-    flag1[cell] = False
-    flag2[cell] = False
-
-# Loop over cells
-for cell in cells(mesh):
-    if cell.index() == 15:
-        flag1[cell] = True
-        flag2[cell] = True
-        for facet in facets(cell):
-            # Filtered list of neighbor cells
-            neighbor = filter(lambda ci: ci != cell.index(), 
-                              facet.entities(tdim))
-            ncell = Cell(mesh, neighbor[0])
-            flag2[ncell] = True
+flag1 = cell_markers(mesh, marked)
+flag2 = cell_markers(mesh, expand(adj, marked, 1))
 
 mesh_new = adapt(mesh, flag2)
 
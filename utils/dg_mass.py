@@ -0,0 +1,47 @@
+"""
+Inverse of DG mass matrix
+
+The DG mass matrix is block diagonal with one nloc x nloc block per cell. The
+inverse blocks are computed once and stored as a dense (ncells, nloc, nloc)
+array, so M^{-1} b is a batched small matrix-vector product, no global solve.
+
+   from dg_mass import InverseMass
+   Minv = InverseMass(V)
+   Minv.solve(x.vector(), b)    # same call as LUSolver(M).solve(x, b)
+
+Works in serial only.
+"""
+import numpy as np
+from dolfin import *
+from dolfin_scipy import as_scipy
+
+class InverseMass():
+   def __init__(self, V):
+      mesh = V.mesh()
+      dofmap = V.dofmap()
+      ncells = mesh.num_cells()
+      self.dofs = np.array([dofmap.cell_dofs(c) for c in range(ncells)])
+      nloc = self.dofs.shape[1]
+
+      # cell and local index of every dof
+      cell = np.zeros(V.dim(), dtype=int)
+      loc  = np.zeros(V.dim(), dtype=int)
+      cell[self.dofs] = np.arange(ncells)[:,None]
+      loc[self.dofs]  = np.arange(nloc)[None,:]
+
+      # scatter global mass matrix into cell blocks
+      u, v = TrialFunction(V), TestFunction(V)
+      M = as_scipy(assemble(inner(u,v)*dx)).tocoo()
+      Me = np.zeros((ncells, nloc, nloc))
+      Me[cell[M.row], loc[M.row], loc[M.col]] = M.data
+      self.Minv = np.linalg.inv(Me)
+
+   def apply(self, b):
+      """Returns M^{-1} b as numpy array, b is numpy array"""
+      x = np.empty_like(b)
+      x[self.dofs] = np.einsum('cij,cj->ci', self.Minv, b[self.dofs])
+      return x
+
+   def solve(self, x, b):
+      """x = M^{-1} b for dolfin vectors x, b"""
+      x[:] = self.apply(b.array())
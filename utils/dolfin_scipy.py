@@ -0,0 +1,53 @@
+"""
+Conversion of dolfin matrices to scipy.sparse
+
+   from dolfin_scipy import as_scipy
+   A = as_scipy(assemble(a))
+
+For the uBLAS and Eigen backends the returned CSR matrix shares memory with
+the dolfin matrix, so no copy of the values or indices is made. For PETSc the
+CSR arrays are obtained from petsc4py, which makes one copy; if dolfin is built
+without petsc4py the matrix is copied through a dense array, which is only
+feasible for small problems.
+
+Works in serial only: in parallel a process has only its own rows of A, and
+a RuntimeError is raised.
+
+Note that
+
+   rows, cols, values = A.data()
+   A = sps.csc_matrix((values, cols, rows))
+
+which was used in older codes gives the transpose of A. Use transpose=True if
+the transpose is really wanted; it is also returned without copy.
+"""
+import scipy.sparse as sps
+from dolfin import as_backend_type, PETScMatrix, has_petsc4py, MPI
+
+def csr_arrays(A):
+    """Return (rows, cols, values) CSR arrays of dolfin matrix A"""
+    if MPI.size(A.mpi_comm()) > 1:
+        raise RuntimeError('dolfin_scipy: conversion to scipy works in serial only')
+    A = as_backend_type(A)
+    if isinstance(A, PETScMatrix):
+        if has_petsc4py():
+            return A.mat().getValuesCSR()
+        S = sps.csr_matrix(A.array())
+        return S.indptr, S.indices, S.data
+    # uBLAS, Eigen backends: views into the matrix storage
+    return A.data(deepcopy=False)
+
+def as_scipy(A, transpose=False):
+    """
+    Return dolfin matrix A as scipy.sparse CSR matrix, or A^T in CSC format if
+    transpose=True. A reference to A is kept in the returned matrix so that
+    the shared storage stays alive.
+    """
+    rows, cols, values = csr_arrays(A)
+    shape = (A.size(0), A.size(1))
+    if transpose:
+        S = sps.csc_matrix((values, cols, rows), shape=shape[::-1], copy=False)
+    else:
+        S = sps.csr_matrix((values, cols, rows), shape=shape, copy=False)
+    S._dolfin_matrix = A
+    return S
@@ -0,0 +1,37 @@
+"""
+Generalized eigenvalue problem A x = lambda M x for scipy.sparse A, M
+
+   from eigensolver import eig
+   vals, vecs = eig(A, M)
+
+Small problems (N <= nmax_dense) are solved densely by QZ (LAPACK ggev) which
+gives the full spectrum in one call. Larger problems use shift-invert Arnoldi
+(ARPACK) for k eigenvalues closest to sigma.
+"""
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sps
+import scipy.sparse.linalg as sla
+
+def eig(A, M, k=None, sigma=0.0, nmax_dense=3000, tol=0.0):
+    """
+    Returns eigenvalues and eigenvectors (as columns) sorted by decreasing real
+    part. Infinite eigenvalues from singular M are removed. k is only used by
+    the Krylov solver; default is min(N-2, 100).
+    """
+    N = A.shape[0]
+    if N <= nmax_dense:
+        print('Dense eigenvalue solver, N = %d' % N)
+        Ad = A.toarray() if sps.issparse(A) else np.asarray(A)
+        Md = M.toarray() if sps.issparse(M) else np.asarray(M)
+        vals, vecs = la.eig(Ad, Md)
+        ii = np.isfinite(vals)
+        vals, vecs = vals[ii], vecs[:,ii]
+    else:
+        if k is None:
+            k = min(N-2, 100)
+        print('Krylov eigenvalue solver, N = %d, k = %d' % (N, k))
+        vals, vecs = sla.eigs(sps.csc_matrix(A), k=k, M=sps.csc_matrix(M),
+                              sigma=sigma, which='LM', tol=tol)
+    ii = np.argsort(-vals.real)
+    return vals[ii], vecs[:,ii]
@@ -0,0 +1,62 @@
+"""
+When to refresh a lagged Jacobian in Newton's method
+
+The Jacobian (and its factorization or preconditioner) is kept across Newton
+iterations and time steps and is refreshed only
+
+  * before the first step
+  * in every step if reuse_jacobian=False, i.e., plain Newton
+  * after a step whose residual contraction rate |F_{k+1}|/|F_k| is above
+    max_rate
+
+A step which increases the residual (rate > 1) with a Jacobian from an earlier
+iterate is rejected: the caller restores the iterate, refreshes the Jacobian
+and computes the correction again. A diverging step with a fresh Jacobian is
+accepted, since a refresh would not change it.
+
+   policy = LaggedJacobian(reuse_jacobian, max_rate)
+   for it in range(maxiter):
+      ...
+      reason = policy.refresh()
+      if reason is not None:
+         update_jacobian(reason)  # assemble, factorize, log reason
+      u0 = u.copy(); take step; rate = res_new/res
+      if not policy.accept(rate):
+         u = u0; recompute residual
+         continue
+"""
+
+class LaggedJacobian():
+   def __init__(self, reuse_jacobian=True, max_rate=0.5):
+      self.reuse_jacobian = reuse_jacobian
+      self.max_rate = max_rate
+      self.reason = "first iteration"  # pending refresh, None if there is none
+      self.nstep  = 0  # steps taken with current Jacobian
+
+      # Counters
+      self.nrefresh = 0
+      self.nreject  = 0
+
+   def refresh(self):
+      """Reason for refreshing the Jacobian before the next step, None if the
+      current one is to be used. Counts the refresh."""
+      reason = self.reason
+      if reason is None and not self.reuse_jacobian:
+         reason = ""
+      if reason is not None:
+         self.reason = None
+         self.nstep = 0
+         self.nrefresh += 1
+      return reason
+
+   def accept(self, rate):
+      """Check step with contraction rate |F_{k+1}|/|F_k|; False if the step
+      must be undone"""
+      self.nstep += 1
+      if rate > self.max_rate:
+         self.reason = "rate = %8.3e" % rate
+      if rate > 1.0 and self.nstep > 1:
+         self.reason = "rate = %8.3e, step rejected" % rate
+         self.nreject += 1
+         return False
+      return True
@@ -0,0 +1,50 @@
+"""
+Cell neighbours and k-ring marking for refinement
+
+Cell-to-cell adjacency (cells sharing a facet) is built once as a scipy CSR
+matrix from the cell-vertex array: facets of all cells are sorted and equal
+consecutive facets give the two cells of an interior facet. A boolean marker
+is then grown by k rings with k sparse matrix-vector products, no Python loop
+over cells.
+
+   from mesh_marking import cell_adjacency, expand, cell_markers
+   adj    = cell_adjacency(mesh)
+   marked = np.zeros(mesh.num_cells(), dtype=bool); marked[15] = True
+   mesh   = refine(mesh, cell_markers(mesh, expand(adj, marked, 2)))
+
+Works in serial only.
+"""
+import numpy as np
+import scipy.sparse as sps
+from dolfin import *
+
+def adjacency_from_cells(cells):
+   """CSR adjacency of simplices given as (ncells, tdim+1) vertex array"""
+   ncells, nv = cells.shape
+   # facet i of a cell is the cell without vertex i
+   f = np.concatenate([np.delete(cells, i, axis=1) for i in range(nv)])
+   f.sort(axis=1)
+   owner = np.tile(np.arange(ncells), nv)
+   order = np.lexsort(f.T[::-1])
+   f, owner = f[order], owner[order]
+   same = np.all(f[1:] == f[:-1], axis=1)
+   c0, c1 = owner[:-1][same], owner[1:][same]
+   ones = np.ones(2*len(c0), dtype=np.int8)
+   return sps.csr_matrix((ones, (np.concatenate((c0, c1)), np.concatenate((c1, c0)))),
+                         shape=(ncells, ncells))
+
+def cell_adjacency(mesh):
+   return adjacency_from_cells(mesh.cells())
+
+def expand(adj, marked, k=1):
+   """Add k rings of neighbours to boolean cell marker"""
+   m = np.asarray(marked, dtype=bool).copy()
+   for i in range(k):
+      m |= adj.dot(m.astype(np.int8)) > 0
+   return m
+
+def cell_markers(mesh, marked):
+   """CellFunction for refine/adapt from boolean array"""
+   markers = CellFunction("bool", mesh)
+   markers.array()[:] = marked
+   return markers
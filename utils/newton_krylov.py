@@ -0,0 +1,128 @@
+"""
+Newton-GMRES for F(u) = 0 with lagged Jacobian and Eisenstat-Walker tolerances
+
+   nk = NewtonKrylovSolver(F, u, bcs, J, pc='ilu')
+   while t < Tf:
+      ...
+      nk.solve()
+
+Boundary conditions are applied in homogeneous form to the Newton correction,
+so u must satisfy the Dirichlet conditions before the first solve.
+
+The Jacobian is assembled and handed to GMRES only in the first iteration and
+when the residual contraction rate |F_{k+1}|/|F_k| exceeds max_rate; a step
+which diverges with a Jacobian from an earlier iterate is undone and repeated
+with a fresh one (LaggedJacobian in lagged_jacobian.py). Between refreshes the
+matrix is not touched, so PETSc keeps the preconditioner (ILU, additive
+Schwarz, ...) across Newton iterations and time steps. With
+reuse_jacobian=False it is a plain Newton method.
+
+The relative tolerance of GMRES is chosen by Eisenstat-Walker (choice 2)
+
+   eta_k = gamma (|F_k|/|F_{k-1}|)^alpha
+
+safeguarded by gamma eta_{k-1}^alpha when that is above 0.1, and limited to
+eta_max. Loose tolerances far from the solution, tight ones close to it.
+"""
+from dolfin import *
+from lagged_jacobian import LaggedJacobian
+
+class NewtonKrylovSolver():
+   def __init__(self, F, u, bcs=[], J=None, pc='ilu', reuse_jacobian=True,
+                max_rate=0.5, eta_max=0.9, gamma=0.9, alpha=2.0,
+                atol=1.0e-8, rtol=1.0e-6, maxiter=50):
+      self.F  = F
+      self.u  = u
+      self.J  = J if J is not None else derivative(F, u)
+      self.bcs = []
+      for bc in bcs:
+         bch = DirichletBC(bc)
+         bch.homogenize()
+         self.bcs.append(bch)
+      self.reuse_jacobian = reuse_jacobian
+      self.policy = LaggedJacobian(reuse_jacobian, max_rate)
+      self.eta_max = eta_max
+      self.gamma = gamma
+      self.alpha = alpha
+      self.atol = atol
+      self.rtol = rtol
+      self.maxiter = maxiter
+
+      self.A  = PETScMatrix()
+      self.b  = PETScVector()
+      self.du = u.vector().copy()
+      self.u0 = u.vector().copy()
+      self.solver = PETScKrylovSolver('gmres', pc)
+      self.solver.parameters['absolute_tolerance'] = 0.1*atol
+
+      # Counters
+      self.niter    = 0
+      self.nlinear  = 0
+
+   @property
+   def nrefresh(self):
+      return self.policy.nrefresh
+
+   @property
+   def nreject(self):
+      return self.policy.nreject
+
+   def residual(self):
+      assemble(self.F, tensor=self.b)
+      for bc in self.bcs:
+         bc.apply(self.b)
+      return self.b.norm('l2')
+
+   def update_jacobian(self, reason):
+      assemble(self.J, tensor=self.A)
+      for bc in self.bcs:
+         bc.apply(self.A)
+      self.solver.set_operator(self.A)
+      if self.reuse_jacobian:
+         print("   Jacobian refresh %d: %s" % (self.nrefresh, reason))
+
+   def solve(self):
+      """Newton iterations from current u, returns no. of iterations"""
+      res = res0 = self.residual()
+      res_old = None
+      eta = self.eta_max
+      for it in range(self.maxiter):
+         if res < self.atol or res < self.rtol*res0:
+            return it
+
+         reason = self.policy.refresh()
+         if reason is not None:
+            self.update_jacobian(reason)
+
+         # Eisenstat-Walker forcing term
+         if res_old is not None:
+            eta_new = self.gamma * (res/res_old)**self.alpha
+            safe = self.gamma * eta**self.alpha
+            if safe > 0.1:
+               eta_new = max(eta_new, safe)
+            eta = min(self.eta_max, eta_new)
+         # do not solve more accurately than needed for convergence
+         eta = max(eta, 0.5*max(self.atol, self.rtol*res0)/res)
+         self.solver.parameters['relative_tolerance'] = min(eta, self.eta_max)
+
+         self.du.zero()
+         nl = self.solver.solve(self.du, self.b)
+         self.u0[:] = self.u.vector()
+         self.u.vector().axpy(-1.0, self.du)
+         self.niter += 1
+         self.nlinear += nl
+
+         res_new = self.residual()
+         rate = res_new/res
+         print("   Newton %2d  %12.4e  rate = %8.3e  eta = %8.3e  gmres = %d"
+               % (it+1, res_new, rate, eta, nl))
+         if not self.policy.accept(rate):
+            print("   Newton step rejected")
+            self.u.vector()[:] = self.u0
+            self.residual()
+            continue
+         res_old = res
+         res = res_new
+
+      print("Newton did not converge in %d iterations" % self.maxiter)
+      return self.maxiter
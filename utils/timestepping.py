@@ -0,0 +1,206 @@
+"""
+Time integration of linear problems
+
+   M dy/dt + F(y, t) = 0
+
+where F(y, t) = K y - f(t) is given as a form which is linear in y, e.g., a DG
+operator with time dependent boundary data in f. K and M are assembled once;
+in each step only the form for f(t), if there is one, is assembled.
+
+Schemes: ssprk3, bdf1, bdf2, bdf3, cn. Multi-step schemes are started with
+lower order schemes (bdf2 with bdf1, bdf3 with cn and bdf2 as in the old
+codes). Implicit schemes solve (M + gamma*K) y = rhs with gamma = beta*dt.
+Each integrator keeps its factorizations in a cache keyed by gamma, i.e., by
+(scheme, dt), so a matrix is factorized only once. The cache belongs to the K
+and M of the integrator and is not shared.
+
+   ti = TimeIntegrator(V, lambda B: BForm(B,v,u,g,n), B0, dt, 'bdf2',
+                       set_time=lambda t: setattr(g, 't', t))
+   while ti.t < T:
+      ti.step()
+   B = ti.solution
+
+The solution history is kept in Functions which are rotated, not copied:
+ti.history[0] is the newest solution, ti.history[1] the previous one, etc.
+
+For nonlinear problems (e.g., NS) the coefficients in bdf_coefficients can be
+used to write the BDF forms. For variable time steps, lagrange_coefficients and
+lagrange_derivative_coefficients give extrapolation and BDF coefficients on
+arbitrary time levels.
+"""
+from dolfin import *
+from dg_mass import InverseMass
+
+# y_{n+1} - sum_j a_j y_{n-j} = beta*dt*(dy/dt)_{n+1}
+bdf_coefficients = {'bdf1' : ([1.0], 1.0),
+                    'bdf2' : ([4.0/3.0, -1.0/3.0], 2.0/3.0),
+                    'bdf3' : ([18.0/11.0, -9.0/11.0, 2.0/11.0], 6.0/11.0)}
+
+# Error constants C of BDF-k, LTE = C dt^{k+1} y^{(k+1)}
+bdf_error_constants = {1 : 1.0/2.0, 2 : 2.0/9.0, 3 : 3.0/22.0}
+
+def lagrange_coefficients(t, nodes):
+   """
+   Values l_j(t) of Lagrange basis on time levels nodes. sum_j l_j(t) y_j
+   interpolates or extrapolates y to time t.
+   """
+   w = []
+   for j, tj in enumerate(nodes):
+      l = 1.0
+      for m, tm in enumerate(nodes):
+         if m != j:
+            l *= (t - tm)/(tj - tm)
+      w.append(l)
+   return w
+
+def lagrange_derivative_coefficients(t, nodes):
+   """
+   Derivatives l_j'(t) of Lagrange basis on time levels nodes. With
+   nodes = [t_{n+1}, t_n, ..., t_{n+1-k}] and t = t_{n+1}, these are the
+   coefficients of variable step BDF-k.
+   """
+   w = []
+   for j, tj in enumerate(nodes):
+      d = 0.0
+      for m, tm in enumerate(nodes):
+         if m == j:
+            continue
+         p = 1.0/(tj - tm)
+         for r, tr in enumerate(nodes):
+            if r != j and r != m:
+               p *= (t - tr)/(tj - tr)
+         d += p
+      w.append(d)
+   return w
+
+# Default start-up sequences
+startup_schemes = {'ssprk3' : [],
+                   'bdf1'   : [],
+                   'bdf2'   : ['bdf1'],
+                   'bdf3'   : ['cn', 'bdf2'],
+                   'cn'     : []}
+
+# SSPRK3 coefficients
+ark = [0.0, 3.0/4.0, 1.0/3.0]
+brk = [1.0, 1.0/4.0, 2.0/3.0]
+trk = [0.0, 1.0, 0.5]
+
+class TimeIntegrator():
+   def __init__(self, V, F, y0, dt, scheme='bdf2', set_time=None, t0=0.0,
+                startup=None):
+      assert scheme in startup_schemes
+      self.scheme = scheme
+      self.startup = startup_schemes[scheme] if startup is None else startup
+      self.dt = dt
+      self.t  = t0
+      self.it = 0
+      self.set_time = set_time if set_time is not None else (lambda t: None)
+      self.cache = {}  # (M + gamma*K, LU solver) for each gamma of this K, M
+
+      y, v = TrialFunction(V), TestFunction(V)
+      form = F(y)
+      self.M = PETScMatrix(); assemble(inner(y,v)*dx, tensor=self.M)
+      self.K = PETScMatrix(); assemble(lhs(form), tensor=self.K)
+      self.Lf = rhs(form)
+      self.f  = assemble(self.Lf) if not self.Lf.empty() else None
+
+      # History, newest first; enough for bdf3
+      self.history = [Function(V) for j in range(3)]
+      self.history[0].assign(y0)
+      self.w = self.history[0].vector().copy()  # work vectors
+      self.b = self.history[0].vector().copy()
+
+      if scheme == 'ssprk3':
+         if V.ufl_element().family() == 'Discontinuous Lagrange':
+            self.minv = InverseMass(V)
+         else:
+            self.minv = LUSolver(self.M)
+            self.minv.parameters['reuse_factorization'] = True
+         self.ys = Function(V)  # stage solution
+
+   @property
+   def solution(self):
+      return self.history[0]
+
+   def solver(self, gamma):
+      """LU solver for M + gamma*K; factorized once per gamma"""
+      key = round(gamma, 14)
+      if key not in self.cache:
+         A = self.K.copy()
+         A *= gamma
+         A.axpy(1.0, self.M, False)
+         solver = LUSolver(A)
+         solver.parameters['reuse_factorization'] = True
+         self.cache[key] = (A, solver)
+      return self.cache[key][1]
+
+   def rhs_f(self, t):
+      """Assemble f(t) into self.f, returns None if there is no f"""
+      if self.f is None:
+         return None
+      self.set_time(t)
+      assemble(self.Lf, tensor=self.f)
+      return self.f
+
+   def rotate(self):
+      # new solution goes into storage of oldest one
+      self.history = self.history[-1:] + self.history[:-1]
+
+   def step_bdf(self, scheme):
+      a, beta = bdf_coefficients[scheme]
+      gamma = beta * self.dt
+      self.w.zero()
+      for aj, yj in zip(a, self.history):
+         self.w.axpy(aj, yj.vector())
+      self.M.mult(self.w, self.b)
+      f = self.rhs_f(self.t + self.dt)
+      if f is not None:
+         self.b.axpy(gamma, f)
+      self.rotate()
+      self.solver(gamma).solve(self.history[0].vector(), self.b)
+
+   def step_cn(self):
+      gamma = 0.5 * self.dt
+      y0 = self.history[0].vector()
+      self.K.mult(y0, self.w)
+      self.M.mult(y0, self.b)
+      self.b.axpy(-gamma, self.w)
+      f = self.rhs_f(self.t + 0.5*self.dt)
+      if f is not None:
+         self.b.axpy(self.dt, f)
+      self.rotate()
+      self.solver(gamma).solve(self.history[0].vector(), self.b)
+
+   def step_ssprk3(self):
+      y0 = self.history[0].vector()
+      ys = self.ys.vector()
+      ys[:] = y0
+      for i in range(3):
+         # b = -K ys + f
+         self.K.mult(ys, self.b)
+         self.b *= -1.0
+         f = self.rhs_f(self.t + trk[i]*self.dt)
+         if f is not None:
+            self.b.axpy(1.0, f)
+         self.minv.solve(self.w, self.b)
+         ys *= brk[i]
+         ys.axpy(brk[i]*self.dt, self.w)
+         ys.axpy(ark[i], y0)
+      self.rotate()
+      self.history[0].vector()[:] = ys
+
+   def step(self):
+      """Advance by one time step, returns new time"""
+      if self.it < len(self.startup):
+         scheme = self.startup[self.it]
+      else:
+         scheme = self.scheme
+      if scheme == 'ssprk3':
+         self.step_ssprk3()
+      elif scheme == 'cn':
+         self.step_cn()
+      else:
+         self.step_bdf(scheme)
+      self.it += 1
+      self.t  += self.dt
+      return self.t